@@ -39,11 +39,11 @@ from modules import (
     ResourceMonitor,
     IncrementalBuildTracker,
     BuildHistoryManager,
-    DependencyTracker,
     HealthScoreTracker,
     BuildSession,
     FixSuggestionsDatabase
 )
+from modules.dependency_tracker import get_tracker as get_dependency_tracker
 
 try:
     import psutil
@@ -80,7 +80,7 @@ class BuildMonitorServer:
         self.build_history = BuildHistoryManager(
             history_file=str(working_memory_dir / "build_history.json")
         )
-        self.dependency_tracker = DependencyTracker(
+        self.dependency_tracker = get_dependency_tracker(
             tracker_file=str(working_memory_dir / "dependency_tracker.json"),
             project_root=str(self.project_root)
         )
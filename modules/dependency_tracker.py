@@ -5,22 +5,51 @@ Monitors changes to dependency-related files (CMakeLists.txt, package configs, e
 and provides intelligent recommendations for handling dependency updates.
 """
 
+import fnmatch
+import functools
 import json
 import os
+import re
 import time
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 
 class DependencyTracker:
     """Tracks dependency-related file changes and provides rebuild recommendations."""
     
-    def __init__(self, tracker_file: str = None, project_root: str = None):
+    DEPENDENCY_PATTERNS = (
+        'CMakeLists.txt',
+        '*.cmake',
+        'configure.ac',
+        'configure.in',
+        'Makefile.in',
+        'Makefile.am',
+        'meson.build',
+        'BUILD',
+        'BUILD.bazel',
+        'conanfile.txt',
+        'conanfile.py',
+        'vcpkg.json',
+        'vcpkg-configuration.json',
+        'requirements.txt',
+        'setup.py',
+        'pyproject.toml',
+        'Cargo.toml',
+        'package.json',
+        '*.pc',
+        '*.pc.in'
+    )
+    
+    def __init__(self, tracker_file: str = None, project_root: str = None,
+                 check_interval: int = 3600):
         """Initialize dependency tracker.
         
         Args:
             tracker_file: Path to tracker storage file. If None, uses default location.
             project_root: Root directory of the project. If None, uses current directory.
+            check_interval: Seconds the directory walk may be skipped while no walked
+                directory has changed; known files are still checked every call.
         """
         if tracker_file is None:
             tracker_file = Path.cwd() / "dependency_tracker.json"
@@ -29,8 +58,16 @@ class DependencyTracker:
             
         self.tracker_file = Path(tracker_file)
         self.project_root = Path(project_root)
+        self.check_interval = check_interval
+        # Walk from the resolved root so every discovered path shares a fixed
+        # string prefix that can be sliced off instead of using Path.relative_to
+        self._root_dir = str(self.project_root.resolve())
+        self._root_prefix = os.path.join(self._root_dir, '')
         self.tracker_data = self._load_tracker_data()
         
+        self.dependency_patterns = list(self.DEPENDENCY_PATTERNS)
+        self._compile_patterns()
+        
         # Self-documentation metadata for AI assistants
         self.help_data = {
             "name": "Dependency Tracker",
@@ -57,7 +94,7 @@ class DependencyTracker:
                 "check_interval": {
                     "type": "int",
                     "default": 3600,
-                    "description": "Seconds between dependency checks"
+                    "description": "Maximum seconds between full directory walks; known files are checked on every call"
                 }
             },
             "output_format": {
@@ -166,96 +203,115 @@ class DependencyTracker:
         except Exception as e:
             print(f"Warning: Could not save dependency tracker data: {e}")
     
-    def _get_dependency_files(self) -> List[Path]:
-        """Get list of dependency-related files to monitor."""
-        dependency_patterns = [
-            'CMakeLists.txt',
-            '*.cmake',
-            'configure.ac',
-            'configure.in',
-            'Makefile.in',
-            'Makefile.am',
-            'meson.build',
-            'BUILD',
-            'BUILD.bazel',
-            'conanfile.txt',
-            'conanfile.py',
-            'vcpkg.json',
-            'vcpkg-configuration.json',
-            'requirements.txt',
-            'setup.py',
-            'pyproject.toml',
-            'Cargo.toml',
-            'package.json',
-            '*.pc',
-            '*.pc.in'
-        ]
+    def _get_dependency_files(self, dir_mtimes: Dict[str, int] = None) -> List[Tuple[str, float]]:
+        """Get (relative path, mtime) pairs for dependency-related files to monitor.
         
+        Args:
+            dir_mtimes: If given, filled with the mtime_ns of every walked directory,
+                keyed by relative path ('' for the project root).
+        """
         dependency_files = []
+        pattern_match = self._pattern_re.match
+        prefix_len = len(self._root_prefix)
+        pending_dirs = [self._root_dir]
         
-        # Walk through project directory
-        for root, dirs, files in os.walk(self.project_root):
-            root_path = Path(root)
-            
-            # Skip build and other irrelevant directories
-            dirs[:] = [d for d in dirs if not self._should_ignore_directory(d)]
+        # Walk through project directory, collecting mtimes from the scandir entries
+        while pending_dirs:
+            dir_path = pending_dirs.pop()
+            try:
+                # Stat before listing so an entry added mid-walk still changes the mtime
+                if dir_mtimes is not None:
+                    dir_mtimes[dir_path[prefix_len:]] = os.stat(dir_path).st_mtime_ns
+                with os.scandir(dir_path) as it:
+                    entries = list(it)
+            except OSError:
+                continue
             
-            for file in files:
-                file_path = root_path / file
-                
-                # Check if file matches dependency patterns
-                for pattern in dependency_patterns:
-                    if self._matches_pattern(file, pattern):
-                        dependency_files.append(file_path)
-                        break
+            for entry in entries:
+                if entry.is_dir():
+                    # Skip build and other irrelevant directories
+                    if not entry.is_symlink() and not self._should_ignore_directory(entry.name):
+                        pending_dirs.append(entry.path)
+                elif pattern_match(entry.name):
+                    try:
+                        file_mtime = entry.stat().st_mtime
+                    except OSError:
+                        continue
+                    dependency_files.append((entry.path[prefix_len:], file_mtime))
         
         return dependency_files
     
+    def _directories_unchanged(self, dir_mtimes: Dict[str, int]) -> bool:
+        """Check whether every directory seen by the last walk still has its recorded mtime.
+        
+        Adding, removing or renaming an entry changes its directory's mtime, so
+        unchanged directories mean the set of dependency files is unchanged.
+        """
+        root_prefix = self._root_prefix
+        try:
+            for relative_dir, mtime_ns in dir_mtimes.items():
+                if os.stat(root_prefix + relative_dir).st_mtime_ns != mtime_ns:
+                    return False
+        except OSError:
+            return False
+        return True
+    
+    def _stat_tracked_files(self) -> List[Tuple[str, float]]:
+        """Get (relative path, mtime) pairs for the already tracked files, without a walk."""
+        dependency_files = []
+        root_prefix = self._root_prefix
+        for relative_path in self.tracker_data["dependency_files"]:
+            try:
+                file_mtime = os.stat(root_prefix + relative_path).st_mtime
+            except OSError:
+                continue
+            dependency_files.append((relative_path, file_mtime))
+        return dependency_files
+    
+    def _compile_patterns(self):
+        """Compile all dependency patterns into a single regex."""
+        self._pattern_re = re.compile(
+            "|".join(fnmatch.translate(p) for p in self.dependency_patterns)
+        )
+    
     def _should_ignore_directory(self, dirname: str) -> bool:
         """Check if directory should be ignored."""
         ignore_dirs = {'build', '.git', '__pycache__', '.pytest_cache', 
                       'node_modules', '.vscode', '.idea', '.vs', 'venv', '.venv'}
         return dirname in ignore_dirs
     
-    def _matches_pattern(self, filename: str, pattern: str) -> bool:
-        """Check if filename matches dependency file pattern."""
-        if '*' in pattern:
-            # Simple wildcard matching
-            if pattern.startswith('*.'):
-                return filename.endswith(pattern[1:])
-            elif pattern.endswith('*'):
-                return filename.startswith(pattern[:-1])
-        else:
-            return filename == pattern
-        return False
-    
     def detect_dependency_changes(self) -> Optional[List[Dict[str, Any]]]:
         """Detect changes in dependency-related files."""
         current_time = time.time()
-        dependency_files = self._get_dependency_files()
+        
+        # Skip the directory walk while no walked directory has gained, lost or
+        # renamed an entry and the last full scan is within the check interval.
+        # Edits do not touch directory mtimes, so the known files are still stat'ed.
+        metadata = self.tracker_data["metadata"]
+        dir_mtimes = metadata.get("dir_mtimes_ns")
+        if (dir_mtimes
+                and current_time - metadata.get("last_scan", 0) < self.check_interval
+                and self._directories_unchanged(dir_mtimes)):
+            dependency_files = self._stat_tracked_files()
+        else:
+            dir_mtimes = {}
+            dependency_files = self._get_dependency_files(dir_mtimes)
+            metadata["last_scan"] = current_time
+            metadata["dir_mtimes_ns"] = dir_mtimes
+            metadata.pop("root_mtime_ns", None)
+        
         changes = []
+        tracked_files = self.tracker_data["dependency_files"]
         
-        for file_path in dependency_files:
-            try:
-                if not file_path.exists():
-                    continue
-                
-                relative_path = str(file_path.relative_to(self.project_root))
-                file_mtime = file_path.stat().st_mtime
+        for relative_path, file_mtime in dependency_files:
+            # Check if file has been modified since last check
+            if file_mtime > tracked_files.get(relative_path, 0):
+                change_info = self._analyze_dependency_change(relative_path)
+                if change_info:
+                    changes.append(change_info)
                 
-                # Check if file has been modified since last check
-                last_mtime = self.tracker_data["dependency_files"].get(relative_path, 0)
-                
-                if file_mtime > last_mtime:
-                    change_info = self._analyze_dependency_change(file_path, relative_path)
-                    if change_info:
-                        changes.append(change_info)
-                    
-                    # Update tracking data
-                    self.tracker_data["dependency_files"][relative_path] = file_mtime
-                
-            except (OSError, ValueError):
-                continue
+                # Update tracking data
+                tracked_files[relative_path] = file_mtime
         
         # Update metadata
         self.tracker_data["last_check"] = current_time
@@ -268,9 +324,9 @@ class DependencyTracker:
         
         return None
     
-    def _analyze_dependency_change(self, file_path: Path, relative_path: str) -> Optional[Dict[str, Any]]:
+    def _analyze_dependency_change(self, relative_path: str) -> Optional[Dict[str, Any]]:
         """Analyze a dependency file change and determine impact."""
-        filename = file_path.name
+        filename = os.path.basename(relative_path)
         
         # Determine change type
         change_type = self._classify_dependency_file(filename)
@@ -370,11 +426,11 @@ class DependencyTracker:
         
         # Group files by type
         file_types = {}
-        for file_path in monitored_files:
-            file_type = self._classify_dependency_file(file_path.name)
+        for relative_path, _ in monitored_files:
+            file_type = self._classify_dependency_file(os.path.basename(relative_path))
             if file_type not in file_types:
                 file_types[file_type] = []
-            file_types[file_type].append(str(file_path.relative_to(self.project_root)))
+            file_types[file_type].append(relative_path)
         
         status["files_by_type"] = file_types
         
@@ -384,6 +440,7 @@ class DependencyTracker:
         """Force a dependency scan regardless of timestamps."""
         # Clear tracking data to force detection of all files
         self.tracker_data["dependency_files"] = {}
+        self.tracker_data["metadata"].pop("dir_mtimes_ns", None)
         
         # Perform scan
         changes = self.detect_dependency_changes()
@@ -395,11 +452,32 @@ class DependencyTracker:
         self.tracker_data["dependency_files"] = {}
         self.tracker_data["last_check"] = 0
         self.tracker_data["metadata"]["total_checks"] = 0
+        self.tracker_data["metadata"].pop("dir_mtimes_ns", None)
         self._save_tracker_data()
     
     def add_custom_dependency_pattern(self, pattern: str):
         """Add a custom file pattern to monitor."""
-        # This would be used to extend monitoring to project-specific files
-        # Implementation would require extending the _get_dependency_files method
-        # For now, this is a placeholder for future extensibility
-        pass
\ No newline at end of file
+        if pattern not in self.dependency_patterns:
+            self.dependency_patterns.append(pattern)
+            self._compile_patterns()
+            self.tracker_data["metadata"].pop("dir_mtimes_ns", None)
+
+
+def get_tracker(tracker_file: str = None, project_root: str = None) -> DependencyTracker:
+    """Get a shared DependencyTracker for the given tracker file and project root.
+    
+    Instances are cached so repeated callers reuse the loaded tracker data
+    instead of constructing a new tracker per request. Defaults are resolved
+    against the current directory on every call, so a later chdir gets its own tracker.
+    """
+    if project_root is None:
+        project_root = Path.cwd()
+    if tracker_file is None:
+        tracker_file = Path.cwd() / "dependency_tracker.json"
+    return _get_cached_tracker(os.path.abspath(tracker_file), os.path.abspath(project_root))
+
+
+@functools.lru_cache(maxsize=16)
+def _get_cached_tracker(tracker_file: str, project_root: str) -> DependencyTracker:
+    """Construct one DependencyTracker per normalised (tracker file, project root) pair."""
+    return DependencyTracker(tracker_file=tracker_file, project_root=project_root)
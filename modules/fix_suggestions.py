@@ -5,15 +5,125 @@ Provides pattern recognition for common build errors and suggests actionable fix
 with confidence scores and step-by-step resolution commands.
 """
 
+import functools
+import heapq
 import json
+import operator
+import os
 import re
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Buffer size for reading and writing the suggestions database
+_IO_BUFFER_SIZE = 64 * 1024
+
+# Source file extensions that earn C/C++ specific confidence bonuses
+_CPP_EXTS = frozenset({'.c', '.cpp', '.cc', '.cxx', '.h', '.hpp'})
+
+
+# Self-documentation metadata for AI assistants
+_HELP_DATA = {
+    "name": "Fix Suggestions Database",
+    "description": "Intelligent error pattern recognition with actionable fix suggestions",
+    "version": "1.0.0",
+    "features": [
+        "Pattern-based error recognition with regex matching",
+        "Confidence scoring for fix suggestions (0-100%)",
+        "Step-by-step fix commands with complexity assessment",
+        "Context-aware suggestions based on file paths and error types",
+        "Extensible database of common C/C++ build error patterns"
+    ],
+    "configuration": {
+        "min_confidence_threshold": {
+            "type": "int",
+            "default": 60,
+            "description": "Minimum confidence score to include suggestions"
+        },
+        "max_suggestions_per_error": {
+            "type": "int",
+            "default": 3,
+            "description": "Maximum number of suggestions per error"
+        },
+        "enable_learning": {
+            "type": "bool",
+            "default": False,
+            "description": "Enable learning from successful fixes (future feature)"
+        }
+    },
+    "output_format": {
+        "pattern": "Pattern identifier for the error",
+        "suggested_fix": "Human-readable fix description",
+        "fix_commands": "Array of shell commands to execute",
+        "fix_type": "quick, medium, or complex",
+        "confidence": "Confidence score 0-100"
+    },
+    "token_cost": "10-20 tokens per error with suggestions",
+    "ai_metadata": {
+        "purpose": "Provide immediate, actionable solutions for common build errors",
+        "when_to_use": "Automatically applied when error patterns match known issues",
+        "interpretation": {
+            "high_confidence": ">90% confidence: Execute immediately, very reliable",
+            "medium_confidence": "70-90% confidence: Review before execution",
+            "low_confidence": "<70% confidence: Use as guidance, verify applicability",
+            "fix_type_quick": "1-2 commands, usually safe to execute",
+            "fix_type_medium": "3-5 commands, review for environment compatibility",
+            "fix_type_complex": "6+ commands or system changes, careful consideration required"
+        },
+        "recommendations": {
+            "multiple_suggestions": "Try suggestions in confidence order",
+            "repeated_errors": "Consider adding project-specific patterns",
+            "low_success_rate": "Review and refine pattern matching rules"
+        }
+    },
+    "examples": [
+        {
+            "scenario": "Missing OpenSSL development headers",
+            "error": "fatal error: openssl/ssl.h: No such file or directory",
+            "output": {
+                "pattern": "missing_openssl_headers",
+                "suggested_fix": "Install OpenSSL development packages",
+                "fix_commands": ["sudo apt update", "sudo apt install -y libssl-dev openssl"],
+                "fix_type": "quick",
+                "confidence": 95
+            },
+            "interpretation": "High confidence quick fix for missing system dependency"
+        },
+        {
+            "scenario": "CMake can't find package",
+            "error": "CMake Error: Could not find package OpenSSL",
+            "output": {
+                "pattern": "cmake_missing_package", 
+                "suggested_fix": "Install missing package and clear CMake cache",
+                "fix_commands": ["sudo apt install -y libssl-dev", "rm -rf build/CMakeCache.txt", "cmake .."],
+                "fix_type": "medium",
+                "confidence": 88
+            },
+            "interpretation": "Medium confidence fix requiring cache clear"
+        }
+    ],
+    "troubleshooting": {
+        "no_suggestions": "Error pattern not recognized, consider extending database",
+        "inappropriate_suggestions": "Review pattern matching rules for false positives",
+        "outdated_commands": "Update suggestion database for current system versions"
+    }
+}
+
 
 class FixSuggestionsDatabase:
     """Database of fix suggestions for common build errors with pattern matching."""
     
+    # Minimum confidence score for a pattern to be suggested
+    MIN_CONFIDENCE = 60
+    # Largest total of context adjustments: C/C++ file (5) + long message (3)
+    # + fatal error (2) + Linux applicability (2)
+    MAX_CONTEXT_BONUS = 12
+    
     def __init__(self, suggestions_file: str = None):
         """Initialize fix suggestions database.
         
@@ -24,115 +134,133 @@ class FixSuggestionsDatabase:
             suggestions_file = Path(__file__).parent / "fix_suggestions.json"
             
         self.suggestions_file = Path(suggestions_file)
+        # Compiled regexes shared by every pattern using the same source string
+        self._regex_intern: Dict[str, re.Pattern] = {}
         self.suggestions_db = self._load_suggestions_db()
+        self._build_prefilter()
+        self._dirty = False
         
-        # Self-documentation metadata for AI assistants
-        self.help_data = {
-            "name": "Fix Suggestions Database",
-            "description": "Intelligent error pattern recognition with actionable fix suggestions",
-            "version": "1.0.0",
-            "features": [
-                "Pattern-based error recognition with regex matching",
-                "Confidence scoring for fix suggestions (0-100%)",
-                "Step-by-step fix commands with complexity assessment",
-                "Context-aware suggestions based on file paths and error types",
-                "Extensible database of common C/C++ build error patterns"
-            ],
-            "configuration": {
-                "min_confidence_threshold": {
-                    "type": "int",
-                    "default": 60,
-                    "description": "Minimum confidence score to include suggestions"
-                },
-                "max_suggestions_per_error": {
-                    "type": "int",
-                    "default": 3,
-                    "description": "Maximum number of suggestions per error"
-                },
-                "enable_learning": {
-                    "type": "bool",
-                    "default": False,
-                    "description": "Enable learning from successful fixes (future feature)"
-                }
-            },
-            "output_format": {
-                "pattern": "Pattern identifier for the error",
-                "suggested_fix": "Human-readable fix description",
-                "fix_commands": "Array of shell commands to execute",
-                "fix_type": "quick, medium, or complex",
-                "confidence": "Confidence score 0-100"
-            },
-            "token_cost": "10-20 tokens per error with suggestions",
-            "ai_metadata": {
-                "purpose": "Provide immediate, actionable solutions for common build errors",
-                "when_to_use": "Automatically applied when error patterns match known issues",
-                "interpretation": {
-                    "high_confidence": ">90% confidence: Execute immediately, very reliable",
-                    "medium_confidence": "70-90% confidence: Review before execution",
-                    "low_confidence": "<70% confidence: Use as guidance, verify applicability",
-                    "fix_type_quick": "1-2 commands, usually safe to execute",
-                    "fix_type_medium": "3-5 commands, review for environment compatibility",
-                    "fix_type_complex": "6+ commands or system changes, careful consideration required"
-                },
-                "recommendations": {
-                    "multiple_suggestions": "Try suggestions in confidence order",
-                    "repeated_errors": "Consider adding project-specific patterns",
-                    "low_success_rate": "Review and refine pattern matching rules"
-                }
-            },
-            "examples": [
-                {
-                    "scenario": "Missing OpenSSL development headers",
-                    "error": "fatal error: openssl/ssl.h: No such file or directory",
-                    "output": {
-                        "pattern": "missing_openssl_headers",
-                        "suggested_fix": "Install OpenSSL development packages",
-                        "fix_commands": ["sudo apt update", "sudo apt install -y libssl-dev openssl"],
-                        "fix_type": "quick",
-                        "confidence": 95
-                    },
-                    "interpretation": "High confidence quick fix for missing system dependency"
-                },
-                {
-                    "scenario": "CMake can't find package",
-                    "error": "CMake Error: Could not find package OpenSSL",
-                    "output": {
-                        "pattern": "cmake_missing_package", 
-                        "suggested_fix": "Install missing package and clear CMake cache",
-                        "fix_commands": ["sudo apt install -y libssl-dev", "rm -rf build/CMakeCache.txt", "cmake .."],
-                        "fix_type": "medium",
-                        "confidence": 88
-                    },
-                    "interpretation": "Medium confidence fix requiring cache clear"
-                }
-            ],
-            "troubleshooting": {
-                "no_suggestions": "Error pattern not recognized, consider extending database",
-                "inappropriate_suggestions": "Review pattern matching rules for false positives",
-                "outdated_commands": "Update suggestion database for current system versions"
-            }
-        }
+        # Build logs repeat identical error lines, so memoize lookups per instance
+        self._find_fix_suggestions_cached = functools.lru_cache(maxsize=2048)(
+            self._find_fix_suggestions
+        )
+    
+    @property
+    def help_data(self) -> Dict[str, Any]:
+        """Self-documentation metadata for AI assistants."""
+        return _HELP_DATA
     
     def _load_suggestions_db(self) -> Dict[str, Any]:
         """Load or create fix suggestions database."""
+        db = None
         try:
             if self.suggestions_file.exists():
-                with open(self.suggestions_file, 'r') as f:
-                    return json.load(f)
+                with open(self.suggestions_file, 'rb', buffering=_IO_BUFFER_SIZE) as f:
+                    raw = f.read()
+                db = orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
         except (json.JSONDecodeError, IOError):
             pass
         
-        # Create default database with common patterns
-        default_db = self._create_default_suggestions_db()
-        self._save_suggestions_db(default_db)
-        return default_db
+        if db is None:
+            # Create default database with common patterns
+            db = self._create_default_suggestions_db()
+            self._save_suggestions_db(db)
+        
+        for pattern_data in db.get("patterns", {}).values():
+            self._prepare_pattern(pattern_data)
+        
+        return db
+    
+    def _prepare_pattern(self, pattern_data: Dict[str, Any]):
+        """Attach runtime-only derived fields (prefixed with '_') to a pattern."""
+        compiled_patterns = []
+        for pattern in pattern_data.get("regex_patterns", []):
+            try:
+                compiled_patterns.append(self._compile_regex(pattern))
+            except re.error:
+                continue  # An invalid alternative can never match
+        pattern_data["_compiled_patterns"] = compiled_patterns
+        
+        # All alternatives in one regex so non-matching errors take a single scan.
+        # Joining renumbers capture groups and breaks backreferences, so only
+        # group-free alternatives are combined; the rest are searched one by one
+        union_re = None
+        if compiled_patterns and all(compiled.groups == 0 for compiled in compiled_patterns):
+            try:
+                union_re = self._compile_regex(
+                    "|".join(f"(?:{compiled.pattern})" for compiled in compiled_patterns)
+                )
+            except re.error:
+                pass  # e.g. leading global flags such as (?i) cannot be nested
+        pattern_data["_union_re"] = union_re
+        
+        # Static per-pattern flags used by the context adjustments
+        suggested_fix = pattern_data.get("suggested_fix", "").lower()
+        applicable_systems = pattern_data.get("applicable_systems", [])
+        pattern_data["_is_cpp_related"] = any(
+            keyword in suggested_fix for keyword in ('library', 'header', 'linker')
+        )
+        pattern_data["_is_linux_applicable"] = (
+            "all" in applicable_systems or "linux" in applicable_systems
+        )
+    
+    def _compile_regex(self, pattern: str) -> re.Pattern:
+        """Compile a case-insensitive regex, reusing an identical earlier compile."""
+        compiled = self._regex_intern.get(pattern)
+        if compiled is None:
+            compiled = self._regex_intern[pattern] = re.compile(pattern, re.IGNORECASE)
+        return compiled
+    
+    def _build_prefilter(self):
+        """Combine the per-pattern union regexes into one prefilter regex.
+        
+        Most error lines match no known pattern; a single scan with the
+        prefilter rules those out before any per-pattern work is done. Patterns
+        without a union regex (capture groups, nested-flag errors) are left out
+        of the prefilter and always scanned.
+        """
+        alternatives = []
+        unfiltered = []
+        for pattern_id, pattern_data in self.suggestions_db.get("patterns", {}).items():
+            union_re = pattern_data.get("_union_re")
+            if union_re is not None:
+                alternatives.append(union_re.pattern)
+            else:
+                unfiltered.append((pattern_id, pattern_data))
+        
+        try:
+            self._prefilter_re = re.compile("|".join(alternatives), re.IGNORECASE) \
+                if alternatives else None
+        except re.error:
+            self._prefilter_re = None
+        
+        if self._prefilter_re is None:
+            # Nothing is prefiltered, so a prefilter miss never happens
+            unfiltered = []
+        self._unfiltered_patterns = tuple(unfiltered)
     
     def _save_suggestions_db(self, db: Dict[str, Any]):
         """Save suggestions database to file."""
+        # Strip runtime-only derived fields, which are not JSON serializable
+        serializable_db = dict(db)
+        if "patterns" in db:
+            serializable_db["patterns"] = {
+                pattern_id: {k: v for k, v in pattern_data.items() if not k.startswith("_")}
+                for pattern_id, pattern_data in db["patterns"].items()
+            }
+        
+        if HAS_ORJSON:
+            payload = orjson.dumps(serializable_db)
+        else:
+            payload = json.dumps(serializable_db, separators=(',', ':')).encode('utf-8')
+        
+        # Write to a temporary file and swap it in so a crash never leaves a truncated database
+        temp_file = self.suggestions_file.with_name(self.suggestions_file.name + '.tmp')
         try:
             self.suggestions_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.suggestions_file, 'w') as f:
-                json.dump(db, f, indent=2)
+            with open(temp_file, 'wb', buffering=_IO_BUFFER_SIZE) as f:
+                f.write(payload)
+            os.replace(temp_file, self.suggestions_file)
         except Exception as e:
             print(f"Warning: Could not save fix suggestions database: {e}")
     
@@ -352,16 +480,43 @@ class FixSuggestionsDatabase:
         Returns:
             List of fix suggestion dictionaries with confidence scores
         """
+        # Only the file extension matters for context adjustments
+        file_ext = os.path.splitext(file_path)[1].lower() if file_path else ""
+        
+        cached = self._find_fix_suggestions_cached(error_message, file_ext, error_category)
+        
+        # Hand out copies so callers cannot mutate cached results
+        return [dict(suggestion, fix_commands=list(suggestion["fix_commands"]))
+                for suggestion in cached]
+    
+    def _find_fix_suggestions(self, error_message: str, file_ext: str,
+                              error_category: str) -> Tuple[Dict[str, Any], ...]:
+        """Scan the pattern database for suggestions matching an error message."""
         suggestions = []
         
         if "patterns" not in self.suggestions_db:
-            return suggestions
+            return ()
         
-        # Check each pattern in the database
-        for pattern_id, pattern_data in self.suggestions_db["patterns"].items():
-            confidence = self._calculate_confidence(error_message, file_path, pattern_data)
+        # When no prefiltered pattern can match, only scan the patterns left out of it
+        candidates = self.suggestions_db["patterns"].items()
+        if self._prefilter_re is not None and not self._prefilter_re.search(error_message):
+            candidates = self._unfiltered_patterns
+            if not candidates:
+                return ()
+        
+        # Context that depends only on the error, shared by every pattern
+        is_cpp_file, message_adjustment = self._error_context(error_message, file_ext)
+        
+        # Check each candidate pattern in the database
+        for pattern_id, pattern_data in candidates:
+            # Skip the regex scan for patterns that can never reach the threshold
+            if pattern_data.get("confidence", 50) + self.MAX_CONTEXT_BONUS < self.MIN_CONFIDENCE:
+                continue
+            
+            confidence = self._calculate_confidence(error_message, pattern_data,
+                                                    is_cpp_file, message_adjustment)
             
-            if confidence >= 60:  # Minimum confidence threshold
+            if confidence >= self.MIN_CONFIDENCE:
                 suggestion = {
                     "pattern": pattern_id,
                     "suggested_fix": pattern_data["suggested_fix"],
@@ -376,107 +531,132 @@ class FixSuggestionsDatabase:
                 
                 suggestions.append(suggestion)
         
-        # Sort by confidence score (highest first)
-        suggestions.sort(key=lambda x: x["confidence"], reverse=True)
+        # Top 3 suggestions by confidence score (highest first)
+        return tuple(heapq.nlargest(3, suggestions, key=operator.itemgetter("confidence")))
+    
+    def _error_context(self, error_message: str, file_ext: str) -> Tuple[bool, int]:
+        """Compute per-error context: C/C++ source flag and message specificity bonus."""
+        message_adjustment = 0
+        
+        # Error message specificity bonuses
+        if len(error_message) > 100:  # More detailed error messages
+            message_adjustment += 3
+        
+        if "fatal error" in error_message.lower():
+            message_adjustment += 2
         
-        # Limit to top 3 suggestions
-        return suggestions[:3]
+        return file_ext in _CPP_EXTS, message_adjustment
     
-    def _calculate_confidence(self, error_message: str, file_path: str, 
-                            pattern_data: Dict[str, Any]) -> int:
+    def _calculate_confidence(self, error_message: str, pattern_data: Dict[str, Any],
+                            is_cpp_file: bool, message_adjustment: int) -> int:
         """Calculate confidence score for a pattern match."""
         base_confidence = pattern_data.get("confidence", 50)
         
-        # Check regex pattern matches
-        regex_patterns = pattern_data.get("regex_patterns", [])
-        pattern_matches = 0
-        
-        for pattern in regex_patterns:
-            if re.search(pattern, error_message, re.IGNORECASE):
-                pattern_matches += 1
-        
-        if pattern_matches == 0:
+        # Alternatives are different spellings of the same error, so any match
+        # earns the full base confidence; stop at the first hit
+        union_re = pattern_data.get("_union_re")
+        if union_re is not None:
+            matched = union_re.search(error_message) is not None
+        else:
+            matched = any(compiled.search(error_message)
+                          for compiled in pattern_data.get("_compiled_patterns", ()))
+        if not matched:
             return 0
         
-        # Calculate confidence based on pattern matches
-        match_ratio = pattern_matches / len(regex_patterns)
-        confidence = int(base_confidence * match_ratio)
+        confidence = base_confidence
         
         # Apply context bonuses/penalties
-        confidence += self._apply_context_adjustments(error_message, file_path, pattern_data)
+        confidence += self._apply_context_adjustments(pattern_data, is_cpp_file, message_adjustment)
         
         # Ensure confidence is within valid range
         return max(0, min(100, confidence))
     
-    def _apply_context_adjustments(self, error_message: str, file_path: str, 
-                                 pattern_data: Dict[str, Any]) -> int:
+    def _apply_context_adjustments(self, pattern_data: Dict[str, Any], is_cpp_file: bool,
+                                 message_adjustment: int) -> int:
         """Apply context-based confidence adjustments."""
-        adjustment = 0
+        adjustment = message_adjustment
         
-        # File extension context
-        if file_path:
-            file_ext = Path(file_path).suffix.lower()
-            
-            # C/C++ specific patterns get bonus for C/C++ files
-            if file_ext in ['.c', '.cpp', '.cc', '.cxx', '.h', '.hpp']:
-                if any(keyword in pattern_data.get("suggested_fix", "").lower() 
-                      for keyword in ['library', 'header', 'linker']):
-                    adjustment += 5
-        
-        # Error message specificity bonuses
-        if len(error_message) > 100:  # More detailed error messages
-            adjustment += 3
-        
-        if "fatal error" in error_message.lower():
-            adjustment += 2
+        # C/C++ specific patterns get bonus for C/C++ files
+        if is_cpp_file and pattern_data["_is_cpp_related"]:
+            adjustment += 5
         
         # System applicability
-        applicable_systems = pattern_data.get("applicable_systems", [])
-        if "all" in applicable_systems or "linux" in applicable_systems:
+        if pattern_data["_is_linux_applicable"]:
             adjustment += 2
         
         return adjustment
     
-    def add_custom_pattern(self, pattern_id: str, pattern_data: Dict[str, Any]) -> bool:
+    def add_custom_pattern(self, pattern_id: str, pattern_data: Dict[str, Any],
+                           defer_save: bool = False) -> bool:
         """Add a custom fix pattern to the database.
         
         Args:
             pattern_id: Unique identifier for the pattern
             pattern_data: Pattern data including regex_patterns, suggested_fix, etc.
+            defer_save: If True, skip writing the database; call flush() when done
             
         Returns:
             True if successfully added, False otherwise
         """
-        try:
-            required_fields = ["regex_patterns", "suggested_fix", "fix_commands", 
-                             "fix_type", "confidence"]
-            
-            # Validate required fields
-            for field in required_fields:
-                if field not in pattern_data:
-                    return False
-            
-            # Add to database
-            if "patterns" not in self.suggestions_db:
-                self.suggestions_db["patterns"] = {}
-            
-            self.suggestions_db["patterns"][pattern_id] = pattern_data
-            
-            # Update metadata
-            if "metadata" not in self.suggestions_db:
-                self.suggestions_db["metadata"] = {}
-            
-            self.suggestions_db["metadata"]["pattern_count"] = \
-                len(self.suggestions_db["patterns"])
+        return self.add_custom_patterns({pattern_id: pattern_data}, defer_save=defer_save) == 1
+    
+    def add_custom_patterns(self, patterns: Dict[str, Dict[str, Any]],
+                            defer_save: bool = False) -> int:
+        """Add several custom fix patterns, rebuilding indexes and saving once.
+        
+        Args:
+            patterns: Mapping of pattern identifier to pattern data
+            defer_save: If True, skip writing the database; call flush() when done
             
-            # Save to file
+        Returns:
+            Number of patterns successfully added
+        """
+        required_fields = ["regex_patterns", "suggested_fix", "fix_commands", 
+                         "fix_type", "confidence"]
+        added = 0
+        
+        # Add to database
+        if "patterns" not in self.suggestions_db:
+            self.suggestions_db["patterns"] = {}
+        
+        for pattern_id, pattern_data in patterns.items():
+            try:
+                # Validate required fields
+                if any(field not in pattern_data for field in required_fields):
+                    continue
+                
+                pattern_data = dict(pattern_data)
+                self._prepare_pattern(pattern_data)
+                self.suggestions_db["patterns"][pattern_id] = pattern_data
+                added += 1
+                
+            except Exception as e:
+                print(f"Error adding custom pattern: {e}")
+        
+        if not added:
+            return 0
+        
+        # Update metadata
+        if "metadata" not in self.suggestions_db:
+            self.suggestions_db["metadata"] = {}
+        
+        self.suggestions_db["metadata"]["pattern_count"] = \
+            len(self.suggestions_db["patterns"])
+        self._build_prefilter()
+        self._find_fix_suggestions_cached.cache_clear()
+        
+        # Save to file
+        self._dirty = True
+        if not defer_save:
+            self.flush()
+        
+        return added
+    
+    def flush(self):
+        """Write pending pattern additions made with defer_save=True to file."""
+        if self._dirty:
             self._save_suggestions_db(self.suggestions_db)
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error adding custom pattern: {e}")
-            return False
+            self._dirty = False
     
     def get_pattern_statistics(self) -> Dict[str, Any]:
         """Get statistics about the fix suggestions database."""
@@ -526,18 +706,20 @@ class FixSuggestionsDatabase:
             return {"error": f"Pattern '{pattern_id}' not found"}
         
         pattern_data = self.suggestions_db["patterns"][pattern_id]
-        confidence = self._calculate_confidence(test_error, "", pattern_data)
+        is_cpp_file, message_adjustment = self._error_context(test_error, "")
+        confidence = self._calculate_confidence(test_error, pattern_data,
+                                                is_cpp_file, message_adjustment)
         
         # Check which regex patterns matched
         matched_patterns = []
-        for pattern in pattern_data.get("regex_patterns", []):
-            if re.search(pattern, test_error, re.IGNORECASE):
-                matched_patterns.append(pattern)
+        for compiled in pattern_data.get("_compiled_patterns", []):
+            if compiled.search(test_error):
+                matched_patterns.append(compiled.pattern)
         
         return {
             "pattern_id": pattern_id,
             "confidence": confidence,
             "matched_patterns": matched_patterns,
-            "would_suggest": confidence >= 60,
-            "suggestion": pattern_data["suggested_fix"] if confidence >= 60 else None
+            "would_suggest": confidence >= self.MIN_CONFIDENCE,
+            "suggestion": pattern_data["suggested_fix"] if confidence >= self.MIN_CONFIDENCE else None
         }
\ No newline at end of file
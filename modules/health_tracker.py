@@ -5,16 +5,380 @@ Analyzes build patterns over time to calculate health scores (0-100) based on
 success rate, performance trends, warning patterns, and resource efficiency.
 """
 
+import atexit
+import functools
 import json
+import math
+import os
+import re
 import time
-import statistics
+import weakref
+from array import array
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Number of recent builds kept per target for health calculation
+HEALTH_WINDOW = 20
+
+_NAN = float('nan')
+
+# Metadata defaults for a new or incomplete tracker file
+_DEFAULT_METADATA = {
+    "version": "1.0.0",
+    "total_builds_tracked": 0,
+    "last_calculation": 0
+}
+
+# Welch's t-statistic between the older and newer halves of the health history
+# beyond which the trend counts as a change rather than noise
+TREND_T_THRESHOLD = 1.5
+
+# Smallest shift in mean health score between the halves that can count as a trend
+TREND_MIN_DIFFERENCE = 2.0
+
+
+@functools.lru_cache(maxsize=512)
+def _target_key(targets: Tuple[str, ...]) -> str:
+    """Generate consistent target key for a tuple of targets (memoized)."""
+    if not targets:
+        return "default_build"
+    
+    # Sort targets for consistency
+    sorted_targets = sorted(targets)
+    return "_".join(sorted_targets).replace("/", "_").replace("package_", "pkg_")
+
+
+# Canonical tuple for each distinct target list, shared by every record that uses it
+_TARGETS_INTERN: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _intern_targets(targets: List[str]) -> Tuple[str, ...]:
+    """Return the shared tuple for a target list."""
+    key = tuple(targets)
+    return _TARGETS_INTERN.setdefault(key, key)
+
+
+def _float_slots() -> array:
+    return array('d', [0.0]) * HEALTH_WINDOW
+
+
+@dataclass
+class TargetBuffer:
+    """Fixed-size ring buffer of recent build metrics for one target.
+    
+    Each metric field lives in its own typed array (struct of arrays), so
+    recording a build overwrites one slot per field instead of copying a
+    list of record dicts. Missing optional values are stored as NaN.
+    
+    Window-wide sums and counts are kept up to date as builds are added and
+    evicted, so scoring does not have to re-reduce every slot.
+    """
+    timestamps: array = field(default_factory=_float_slots)
+    successes: array = field(default_factory=lambda: array('b', [0]) * HEALTH_WINDOW)
+    durations: array = field(default_factory=_float_slots)
+    predicted_durations: array = field(default_factory=_float_slots)
+    prediction_accuracies: array = field(default_factory=_float_slots)
+    warning_counts: array = field(default_factory=lambda: array('q', [0]) * HEALTH_WINDOW)
+    cpu_usages: array = field(default_factory=_float_slots)
+    memory_usages: array = field(default_factory=_float_slots)
+    targets: List[Optional[Tuple[str, ...]]] = field(default_factory=lambda: [None] * HEALTH_WINDOW)
+    head: int = 0
+    count: int = 0
+    # Running totals over the builds currently in the window
+    n_success: int = 0
+    sum_duration: float = 0.0
+    n_warned: int = 0
+    n_positive: int = 0
+    sum_positive: float = 0.0
+    n_accurate: int = 0
+    sum_accurate: float = 0.0
+    n_cpu: int = 0
+    sum_cpu: float = 0.0
+    n_memory: int = 0
+    sum_memory: float = 0.0
+    
+    def _account(self, i: int, sign: int):
+        """Add (sign=1) or remove (sign=-1) slot i's contribution to the running totals."""
+        duration = self.durations[i]
+        accuracy = self.prediction_accuracies[i]
+        cpu_usage = self.cpu_usages[i]
+        memory_usage = self.memory_usages[i]
+        
+        self.n_success += sign * self.successes[i]
+        self.sum_duration += sign * duration
+        if self.warning_counts[i]:
+            self.n_warned += sign
+        if duration > 0:
+            self.n_positive += sign
+            self.sum_positive += sign * duration
+        if accuracy > 0.8:
+            self.n_accurate += sign
+            self.sum_accurate += sign * accuracy
+        # NaN marks a build without resource data and fails the self-comparison
+        if cpu_usage == cpu_usage:
+            self.n_cpu += sign
+            self.sum_cpu += sign * cpu_usage
+        if memory_usage == memory_usage:
+            self.n_memory += sign
+            self.sum_memory += sign * memory_usage
+    
+    def _recompute_totals(self):
+        """Rebuild the running totals from the slots, discarding accumulated float error."""
+        self.n_success = self.n_warned = self.n_positive = 0
+        self.n_accurate = self.n_cpu = self.n_memory = 0
+        self.sum_duration = self.sum_positive = self.sum_accurate = 0.0
+        self.sum_cpu = self.sum_memory = 0.0
+        for i in self.newest_first():
+            self._account(i, 1)
+    
+    def append(self, record: Dict[str, Any]):
+        """Store a build metric record, overwriting the oldest slot when full.
+        
+        Every field is coerced before the buffer is touched, so a record that
+        raises TypeError or ValueError leaves the slots and totals unchanged.
+        """
+        predicted = record.get("predicted_duration")
+        cpu_usage = record.get("cpu_usage")
+        memory_usage = record.get("memory_usage")
+        targets = record.get("targets")
+        
+        timestamp = float(record.get("timestamp") or 0.0)
+        success = bool(record["success"])
+        duration = float(record["duration"])
+        predicted = _NAN if predicted is None else float(predicted)
+        accuracy = float(record.get("prediction_accuracy") or 0.0)
+        warning_count = int(record.get("warning_count") or 0)
+        cpu_usage = _NAN if cpu_usage is None else float(cpu_usage)
+        memory_usage = _NAN if memory_usage is None else float(memory_usage)
+        targets = None if targets is None else _intern_targets(targets)
+        
+        i = self.head
+        if self.count == HEALTH_WINDOW:
+            self._account(i, -1)
+        self.timestamps[i] = timestamp
+        self.successes[i] = success
+        self.durations[i] = duration
+        self.predicted_durations[i] = predicted
+        self.prediction_accuracies[i] = accuracy
+        self.warning_counts[i] = warning_count
+        self.cpu_usages[i] = cpu_usage
+        self.memory_usages[i] = memory_usage
+        self.targets[i] = targets
+        self._account(i, 1)
+        
+        self.head = (i + 1) % HEALTH_WINDOW
+        if self.count < HEALTH_WINDOW:
+            self.count += 1
+        elif self.head == 0:
+            # Once per full cycle, resum so add/subtract rounding cannot build up
+            self._recompute_totals()
+    
+    def newest_first(self) -> range:
+        """Slot indices ordered from the most recent build to the oldest."""
+        return range(self.head - 1, self.head - 1 - self.count, -1)
+    
+    def records(self) -> List[Dict[str, Any]]:
+        """Rebuild the stored builds as record dicts, oldest first, for persistence."""
+        records = []
+        for i in reversed(self.newest_first()):
+            predicted = self.predicted_durations[i]
+            cpu_usage = self.cpu_usages[i]
+            memory_usage = self.memory_usages[i]
+            records.append({
+                "timestamp": self.timestamps[i],
+                "success": bool(self.successes[i]),
+                "duration": self.durations[i],
+                "predicted_duration": None if math.isnan(predicted) else predicted,
+                "prediction_accuracy": self.prediction_accuracies[i],
+                "warning_count": self.warning_counts[i],
+                "cpu_usage": None if math.isnan(cpu_usage) else int(cpu_usage),
+                "memory_usage": None if math.isnan(memory_usage) else memory_usage,
+                "targets": self.targets[i]
+            })
+        return records
+    
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "TargetBuffer":
+        """Build a buffer from persisted record dicts, keeping the newest ones."""
+        buffer = cls()
+        for record in records[-HEALTH_WINDOW:]:
+            try:
+                buffer.append(record)
+            except (KeyError, TypeError, ValueError):
+                continue  # Skip a malformed record; append left the buffer unchanged
+        return buffer
+
+
+def _mean_and_variance(values: List[float]) -> Tuple[float, float]:
+    """Mean and sample variance of values; the variance of a single value is 0."""
+    n = len(values)
+    mean = sum(values) / n
+    if n < 2:
+        return mean, 0.0
+    return mean, sum((v - mean) ** 2 for v in values) / (n - 1)
+
+
+def _success_band_score(success_rate: float) -> float:
+    """Map a success rate to a 0-100 score with a slight penalty for any failures."""
+    if success_rate == 1.0:
+        return 100.0
+    elif success_rate >= 0.9:
+        return 85.0 + (success_rate - 0.9) * 150  # 85-100 range
+    elif success_rate >= 0.7:
+        return 60.0 + (success_rate - 0.7) * 125  # 60-85 range
+    else:
+        return success_rate * 85.0  # 0-60 range
+
+
+def _warning_band_score(avg_warnings: float) -> float:
+    """Map an average warning count to a 0-100 score."""
+    if avg_warnings == 0:
+        return 100.0
+    elif avg_warnings <= 2:
+        return 90.0
+    elif avg_warnings <= 5:
+        return 75.0
+    elif avg_warnings <= 10:
+        return 60.0
+    elif avg_warnings <= 20:
+        return 40.0
+    else:
+        return 20.0
+
+
+# Score lookup tables evaluated once at import. A target never holds more than
+# HEALTH_WINDOW builds, so the success score is indexed exactly by
+# [build count][successful builds]; the warning score by the rounded-up
+# average warning count, where the last entry covers everything above 20.
+_SUCCESS_SCORES = [
+    [_success_band_score(n_success / count) if count else 0.0 for n_success in range(count + 1)]
+    for count in range(HEALTH_WINDOW + 1)
+]
+_WARNING_SCORES = [_warning_band_score(avg) for avg in range(22)]
+
+# Live trackers flushed at exit; weak so the exit hook does not keep them alive
+_live_trackers = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_trackers():
+    """Write pending health score updates of every live tracker at interpreter exit."""
+    for tracker in list(_live_trackers):
+        tracker.flush()
+
+
+# Self-documentation metadata for AI assistants
+_HELP_DATA = {
+    "name": "Health Score Tracker",
+    "description": "Analyzes build patterns to calculate comprehensive health scores (0-100)",
+    "version": "1.0.0", 
+    "features": [
+        "Multi-factor health scoring: success rate, performance, warnings, resources",
+        "Target-specific health tracking with trend analysis",
+        "Historical health data with rolling windows (last 20 builds)",
+        "Performance regression detection and alerting",
+        "Warning pattern analysis and impact assessment"
+    ],
+    "configuration": {
+        "health_window_size": {
+            "type": "int",
+            "default": 20,
+            "description": "Number of recent builds to consider for health calculation"
+        },
+        "min_builds_for_score": {
+            "type": "int", 
+            "default": 5,
+            "description": "Minimum builds needed before calculating health score"
+        },
+        "performance_weight": {
+            "type": "float",
+            "default": 0.3,
+            "description": "Weight of performance factor in health score"
+        },
+        "success_weight": {
+            "type": "float",
+            "default": 0.4,
+            "description": "Weight of success rate factor in health score"
+        },
+        "warning_weight": {
+            "type": "float",
+            "default": 0.2,
+            "description": "Weight of warning factor in health score"
+        },
+        "resource_weight": {
+            "type": "float",
+            "default": 0.1,
+            "description": "Weight of resource efficiency factor in health score"
+        }
+    },
+    "output_format": {
+        "health_score": "Integer 0-100 (100 = perfect health)",
+        "health_trend": "improving, stable, or declining",
+        "primary_issues": "Array of main health concerns"
+    },
+    "token_cost": "3-5 tokens per build response (when included)",
+    "ai_metadata": {
+        "purpose": "Provide overall build system health assessment for optimization decisions",
+        "when_to_use": "After 5+ builds to establish baseline health metrics",
+        "interpretation": {
+            "excellent_health": "90-100: Consistently successful, fast, low warnings",
+            "good_health": "70-89: Generally reliable with minor issues",
+            "moderate_health": "50-69: Some problems, needs attention",
+            "poor_health": "<50: Significant issues requiring investigation"
+        },
+        "recommendations": {
+            "declining_health": "Investigate recent changes causing degradation",
+            "performance_issues": "Focus on build time optimization",
+            "warning_increases": "Address growing warning patterns",
+            "resource_inefficiency": "Optimize resource usage during builds"
+        }
+    },
+    "examples": [
+        {
+            "scenario": "Healthy project",
+            "output": {"health_score": 92, "health_trend": "stable"},
+            "interpretation": "Excellent health, builds consistently fast and successful"
+        },
+        {
+            "scenario": "Performance regression",
+            "output": {"health_score": 68, "health_trend": "declining", "primary_issues": ["performance_regression"]},
+            "interpretation": "Build times increasing, investigate recent changes"
+        },
+        {
+            "scenario": "Warning accumulation",
+            "output": {"health_score": 74, "health_trend": "declining", "primary_issues": ["warning_increase"]},
+            "interpretation": "Growing warning count, address before they become errors"
+        }
+    ],
+    "troubleshooting": {
+        "no_health_score": "Need 5+ builds to calculate reliable health score",
+        "unstable_scores": "Increase health window size for more stable metrics",
+        "always_low_score": "Review build configuration and dependency management"
+    }
+}
 
 
 class HealthScoreTracker:
     """Tracks build health metrics and calculates comprehensive health scores."""
     
+    # Build completions appended to the event log before it is compacted into the snapshot
+    SNAPSHOT_INTERVAL = 50
+    
+    # Compact resource usage string from the resource monitor, e.g. "85%/1.5g"
+    _RES_RE = re.compile(r'^(\d+)%/(\d+(?:\.\d+)?)([gm])$')
+    _MEMORY_UNIT_MB = {'g': 1024.0, 'm': 1.0}
+    
+    # Health score updates are written at most this often, or once this many are pending
+    FLUSH_INTERVAL = 2.0
+    FLUSH_PENDING_LIMIT = 10
+    
     def __init__(self, tracker_file: str = None):
         """Initialize health score tracker.
         
@@ -25,135 +389,146 @@ class HealthScoreTracker:
             tracker_file = Path.cwd() / "health_tracker.json"
             
         self.tracker_file = Path(tracker_file)
+        # Append-only log of build completions recorded since the last snapshot
+        self.events_file = self.tracker_file.with_suffix('.events.jsonl')
         self.tracker_data = self._load_tracker_data()
+        self._events_since_snapshot = self._replay_events()
         
-        # Self-documentation metadata for AI assistants
-        self.help_data = {
-            "name": "Health Score Tracker",
-            "description": "Analyzes build patterns to calculate comprehensive health scores (0-100)",
-            "version": "1.0.0", 
-            "features": [
-                "Multi-factor health scoring: success rate, performance, warnings, resources",
-                "Target-specific health tracking with trend analysis",
-                "Historical health data with rolling windows (last 20 builds)",
-                "Performance regression detection and alerting",
-                "Warning pattern analysis and impact assessment"
-            ],
-            "configuration": {
-                "health_window_size": {
-                    "type": "int",
-                    "default": 20,
-                    "description": "Number of recent builds to consider for health calculation"
-                },
-                "min_builds_for_score": {
-                    "type": "int", 
-                    "default": 5,
-                    "description": "Minimum builds needed before calculating health score"
-                },
-                "performance_weight": {
-                    "type": "float",
-                    "default": 0.3,
-                    "description": "Weight of performance factor in health score"
-                },
-                "success_weight": {
-                    "type": "float",
-                    "default": 0.4,
-                    "description": "Weight of success rate factor in health score"
-                },
-                "warning_weight": {
-                    "type": "float",
-                    "default": 0.2,
-                    "description": "Weight of warning factor in health score"
-                },
-                "resource_weight": {
-                    "type": "float",
-                    "default": 0.1,
-                    "description": "Weight of resource efficiency factor in health score"
-                }
-            },
-            "output_format": {
-                "health_score": "Integer 0-100 (100 = perfect health)",
-                "health_trend": "improving, stable, or declining",
-                "primary_issues": "Array of main health concerns"
-            },
-            "token_cost": "3-5 tokens per build response (when included)",
-            "ai_metadata": {
-                "purpose": "Provide overall build system health assessment for optimization decisions",
-                "when_to_use": "After 5+ builds to establish baseline health metrics",
-                "interpretation": {
-                    "excellent_health": "90-100: Consistently successful, fast, low warnings",
-                    "good_health": "70-89: Generally reliable with minor issues",
-                    "moderate_health": "50-69: Some problems, needs attention",
-                    "poor_health": "<50: Significant issues requiring investigation"
-                },
-                "recommendations": {
-                    "declining_health": "Investigate recent changes causing degradation",
-                    "performance_issues": "Focus on build time optimization",
-                    "warning_increases": "Address growing warning patterns",
-                    "resource_inefficiency": "Optimize resource usage during builds"
-                }
-            },
-            "examples": [
-                {
-                    "scenario": "Healthy project",
-                    "output": {"health_score": 92, "health_trend": "stable"},
-                    "interpretation": "Excellent health, builds consistently fast and successful"
-                },
-                {
-                    "scenario": "Performance regression",
-                    "output": {"health_score": 68, "health_trend": "declining", "primary_issues": ["performance_regression"]},
-                    "interpretation": "Build times increasing, investigate recent changes"
-                },
-                {
-                    "scenario": "Warning accumulation",
-                    "output": {"health_score": 74, "health_trend": "declining", "primary_issues": ["warning_increase"]},
-                    "interpretation": "Growing warning count, address before they become errors"
-                }
-            ],
-            "troubleshooting": {
-                "no_health_score": "Need 5+ builds to calculate reliable health score",
-                "unstable_scores": "Increase health window size for more stable metrics",
-                "always_low_score": "Review build configuration and dependency management"
-            }
-        }
+        # Pending health score updates not yet written to the snapshot
+        self._dirty = False
+        self._pending = 0
+        self._last_flush = time.time()
+        _live_trackers.add(self)
+    
+    def __del__(self):
+        # A tracker dropped before exit still writes its pending updates
+        try:
+            self.flush()
+        except Exception:
+            pass
+    
+    @property
+    def help_data(self) -> Dict[str, Any]:
+        """Self-documentation metadata for AI assistants."""
+        return _HELP_DATA
     
     def _load_tracker_data(self) -> Dict[str, Any]:
         """Load health tracker data from file."""
+        loaded = {}
         try:
             if self.tracker_file.exists():
-                with open(self.tracker_file, 'r') as f:
-                    data = json.load(f)
-                    # Ensure required structure
-                    if "build_metrics" not in data:
-                        data["build_metrics"] = {}
-                    if "health_history" not in data:
-                        data["health_history"] = {}
-                    if "metadata" not in data:
-                        data["metadata"] = {}
-                    return data
+                raw = self.tracker_file.read_bytes()
+                loaded = orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
         except (json.JSONDecodeError, IOError):
             pass
         
-        # Return default structure
-        return {
-            "build_metrics": {},
-            "health_history": {},
-            "metadata": {
-                "version": "1.0.0",
-                "total_builds_tracked": 0,
-                "last_calculation": 0
-            }
-        }
+        # Merge over the default structure; containers are fresh per load
+        # because the tracker mutates them in place
+        data = {"build_metrics": {}, "health_history": {}, **loaded}
+        data["metadata"] = {**_DEFAULT_METADATA, **loaded.get("metadata", {})}
+        build_metrics = {}
+        for target_key, records in data["build_metrics"].items():
+            try:
+                build_metrics[target_key] = TargetBuffer.from_records(records)
+            except (KeyError, TypeError, ValueError):
+                continue  # Malformed history for one target; drop it rather than fail to load
+        data["build_metrics"] = build_metrics
+        return data
+    
+    def _replay_events(self) -> int:
+        """Apply build completions logged after the snapshot was written.
+        
+        Returns:
+            Number of events replayed
+        """
+        if not self.events_file.exists():
+            return 0
+        
+        last_seq = self.tracker_data["metadata"].get("last_event_seq", 0)
+        replayed = 0
+        try:
+            with open(self.events_file, 'r') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn line from an interrupted write
+                    
+                    try:
+                        # Skip events already folded into the snapshot
+                        if event.get("seq", 0) <= last_seq:
+                            continue
+                        
+                        self._apply_build_record(event["target_key"], event["record"], event["seq"])
+                    except (AttributeError, KeyError, TypeError, ValueError):
+                        continue  # Malformed event; later events still replay
+                    replayed += 1
+        except IOError:
+            pass
+        
+        return replayed
+    
+    def _append_event(self, target_key: str, metric_record: Dict[str, Any], seq: int):
+        """Append a single build completion to the event log."""
+        event = {"seq": seq, "target_key": target_key, "record": metric_record}
+        line = json.dumps(event, separators=(',', ':')).encode('utf-8') + b'\n'
+        try:
+            self.events_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.events_file, 'a+b') as f:
+                end = f.seek(0, os.SEEK_END)
+                if end:
+                    f.seek(end - 1)
+                    if f.read(1) != b'\n':
+                        # Terminate a torn line from an interrupted write so this
+                        # event is not glued onto it and skipped on replay
+                        line = b'\n' + line
+                f.write(line)
+        except Exception as e:
+            print(f"Warning: Could not append health tracker event: {e}")
     
     def _save_tracker_data(self):
-        """Save tracker data to file."""
+        """Save a full snapshot of tracker data to file and reset the event log."""
+        # Ring buffers are persisted as plain record lists
+        snapshot = dict(self.tracker_data)
+        snapshot["build_metrics"] = {
+            target_key: buffer.records()
+            for target_key, buffer in self.tracker_data["build_metrics"].items()
+        }
+        
+        # Write to a temporary file and swap it in so a crash never leaves a truncated
+        # snapshot, which would otherwise be discarded on the next load
+        temp_file = self.tracker_file.with_name(self.tracker_file.name + '.tmp')
         try:
             self.tracker_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.tracker_file, 'w') as f:
-                json.dump(self.tracker_data, f, indent=2)
+            if HAS_ORJSON:
+                payload = orjson.dumps(snapshot, option=orjson.OPT_INDENT_2)
+            else:
+                payload = json.dumps(snapshot, indent=2).encode('utf-8')
+            temp_file.write_bytes(payload)
+            os.replace(temp_file, self.tracker_file)
+            # Every logged event is now part of the snapshot
+            if self.events_file.exists():
+                self.events_file.unlink()
+            self._events_since_snapshot = 0
+            self._dirty = False
+            self._pending = 0
+            self._last_flush = time.time()
         except Exception as e:
             print(f"Warning: Could not save health tracker data: {e}")
     
+    def _maybe_flush(self):
+        """Mark tracker data as changed and save it if the debounce window has elapsed."""
+        self._dirty = True
+        self._pending += 1
+        if (self._pending >= self.FLUSH_PENDING_LIMIT or
+                time.time() - self._last_flush > self.FLUSH_INTERVAL):
+            self._save_tracker_data()
+    
+    def flush(self):
+        """Write pending health score updates to file."""
+        if self._dirty:
+            self._save_tracker_data()
+    
     def record_build_completion(self, targets: List[str], success: bool, 
                               duration: float, predicted_duration: Optional[float] = None,
                               warning_count: int = 0, resource_usage: Optional[Dict[str, Any]] = None):
@@ -161,25 +536,17 @@ class HealthScoreTracker:
         target_key = self._get_target_key(targets)
         current_time = time.time()
         
-        # Initialize target tracking if needed
-        if target_key not in self.tracker_data["build_metrics"]:
-            self.tracker_data["build_metrics"][target_key] = []
-        
         # Extract resource metrics if available
         cpu_usage = None
         memory_usage = None
-        if resource_usage:
-            res_str = resource_usage.get('res', '')
-            if '%/' in res_str:
-                try:
-                    cpu_str, mem_str = res_str.split('%/')
-                    cpu_usage = int(cpu_str.replace('%', ''))
-                    if mem_str.endswith('g'):
-                        memory_usage = float(mem_str.replace('g', '')) * 1024  # Convert to MB
-                    else:
-                        memory_usage = float(mem_str.replace('m', ''))
-                except (ValueError, IndexError):
-                    pass
+        res_str = resource_usage.get('res') if resource_usage else None
+        # Cheap checks reject missing, non-string and unit-less values before the regex,
+        # so no parsing path can raise
+        if isinstance(res_str, str) and res_str[-1:] in self._MEMORY_UNIT_MB:
+            match = self._RES_RE.match(res_str)
+            if match:
+                cpu_usage = int(match[1])
+                memory_usage = float(match[2]) * self._MEMORY_UNIT_MB[match[3]]  # Convert to MB
         
         # Create build metric record
         metric_record = {
@@ -191,24 +558,34 @@ class HealthScoreTracker:
             "warning_count": warning_count,
             "cpu_usage": cpu_usage,
             "memory_usage": memory_usage,
-            "targets": targets.copy()
+            "targets": _intern_targets(targets)
         }
         
-        # Add to metrics
-        self.tracker_data["build_metrics"][target_key].append(metric_record)
+        # Log the record instead of rewriting the whole tracker file
+        seq = self.tracker_data["metadata"].get("last_event_seq", 0) + 1
+        self._apply_build_record(target_key, metric_record, seq)
+        self._append_event(target_key, metric_record, seq)
         
-        # Maintain rolling window (keep last 20 builds per target)
-        max_history = 20
-        if len(self.tracker_data["build_metrics"][target_key]) > max_history:
-            self.tracker_data["build_metrics"][target_key] = \
-                self.tracker_data["build_metrics"][target_key][-max_history:]
+        self._events_since_snapshot += 1
+        if self._events_since_snapshot >= self.SNAPSHOT_INTERVAL:
+            self._save_tracker_data()
+    
+    def _apply_build_record(self, target_key: str, metric_record: Dict[str, Any], seq: int):
+        """Add a build metric record to the in-memory tracker data."""
+        # Add to metrics; the ring buffer keeps the last HEALTH_WINDOW builds. A new
+        # target is only stored once its first record has been accepted
+        build_metrics = self.tracker_data["build_metrics"]
+        buffer = build_metrics.get(target_key)
+        if buffer is None:
+            buffer = TargetBuffer()
+        buffer.append(metric_record)
+        build_metrics[target_key] = buffer
         
         # Update metadata
         self.tracker_data["metadata"]["total_builds_tracked"] = \
             self.tracker_data["metadata"].get("total_builds_tracked", 0) + 1
-        self.tracker_data["metadata"]["last_update"] = current_time
-        
-        self._save_tracker_data()
+        self.tracker_data["metadata"]["last_update"] = metric_record["timestamp"]
+        self.tracker_data["metadata"]["last_event_seq"] = seq
     
     def calculate_health_score(self, targets: List[str]) -> Optional[int]:
         """Calculate comprehensive health score (0-100) for targets."""
@@ -217,17 +594,102 @@ class HealthScoreTracker:
         if target_key not in self.tracker_data["build_metrics"]:
             return None
         
-        metrics = self.tracker_data["build_metrics"][target_key]
+        buffer = self.tracker_data["build_metrics"][target_key]
+        return self._score_target(target_key, self._compute_aggregates(buffer))
+    
+    def calculate_all_health_scores(self) -> Dict[str, int]:
+        """Calculate health scores for every tracked target with a single save.
+        
+        Returns:
+            Health score per target key, for targets with enough builds to score
+        """
+        current_time = time.time()
+        scores = {}
+        for target_key, buffer in self.tracker_data["build_metrics"].items():
+            score = self._score_target(target_key, self._compute_aggregates(buffer),
+                                       current_time, flush=False)
+            if score is not None:
+                scores[target_key] = score
+        
+        if scores:
+            self._save_tracker_data()
+        return scores
+    
+    def _compute_aggregates(self, buffer: TargetBuffer) -> Dict[str, Any]:
+        """Collect every sum and count used for scoring for a target.
+        
+        Window-wide totals come from the buffer's running totals; only the
+        "last 5" and "previous 5" windows and the newest positive durations
+        are read from the slots, newest first.
+        """
+        successes = buffer.successes
+        durations = buffer.durations
+        warning_counts = buffer.warning_counts
+        
+        n_failures_recent5 = 0
+        sum_warnings_recent5 = 0
+        sum_duration_recent5 = 0.0
+        sum_duration_prev5 = 0.0
+        n_positive_seen = 0
+        sum_positive_recent5 = 0.0
+        
+        for i, slot in enumerate(buffer.newest_first()):
+            if i >= 10 and n_positive_seen >= 5:
+                break
+            duration = durations[slot]
+            
+            if i < 5:
+                if not successes[slot]:
+                    n_failures_recent5 += 1
+                sum_warnings_recent5 += warning_counts[slot]
+                sum_duration_recent5 += duration
+            elif i < 10:
+                sum_duration_prev5 += duration
+            
+            # The newest positive durations feed the performance trend
+            if duration > 0 and n_positive_seen < 5:
+                sum_positive_recent5 += duration
+                n_positive_seen += 1
+        
+        return {
+            "count": buffer.count,
+            "n_success": buffer.n_success,
+            "sum_duration": buffer.sum_duration,
+            "n_failures_recent5": n_failures_recent5,
+            "sum_warnings_recent5": sum_warnings_recent5,
+            "sum_duration_recent5": sum_duration_recent5,
+            "sum_duration_prev5": sum_duration_prev5,
+            "any_warnings": buffer.n_warned > 0,
+            "n_positive_durations": buffer.n_positive,
+            "sum_positive_recent5": sum_positive_recent5,
+            "sum_positive_older": buffer.sum_positive - sum_positive_recent5,
+            "n_accurate": buffer.n_accurate,
+            "sum_accurate": buffer.sum_accurate,
+            "n_cpu": buffer.n_cpu,
+            "sum_cpu": buffer.sum_cpu,
+            "n_memory": buffer.n_memory,
+            "sum_memory": buffer.sum_memory
+        }
+    
+    def _score_target(self, target_key: str, aggregates: Dict[str, Any],
+                      current_time: Optional[float] = None, flush: bool = True) -> Optional[int]:
+        """Calculate and record the health score for a target from its metric aggregates.
         
+        Args:
+            target_key: Key of the target being scored
+            aggregates: Metric aggregates from _compute_aggregates
+            current_time: Timestamp for the history entry; defaults to now
+            flush: Whether to schedule a save; batch callers save once themselves
+        """
         # Need at least 5 builds for reliable health score
-        if len(metrics) < 5:
+        if aggregates["count"] < 5:
             return None
         
         # Calculate component scores
-        success_score = self._calculate_success_score(metrics)
-        performance_score = self._calculate_performance_score(metrics) 
-        warning_score = self._calculate_warning_score(metrics)
-        resource_score = self._calculate_resource_score(metrics)
+        success_score = self._calculate_success_score(aggregates)
+        performance_score = self._calculate_performance_score(aggregates) 
+        warning_score = self._calculate_warning_score(aggregates)
+        resource_score = self._calculate_resource_score(aggregates)
         
         # Weighted health score calculation
         weights = {
@@ -245,7 +707,8 @@ class HealthScoreTracker:
         )
         
         # Record health score in history
-        current_time = time.time()
+        if current_time is None:
+            current_time = time.time()
         if target_key not in self.tracker_data["health_history"]:
             self.tracker_data["health_history"][target_key] = []
         
@@ -266,44 +729,31 @@ class HealthScoreTracker:
                 self.tracker_data["health_history"][target_key][-10:]
         
         self.tracker_data["metadata"]["last_calculation"] = current_time
-        self._save_tracker_data()
+        if flush:
+            self._maybe_flush()
         
         return int(health_score)
     
-    def _calculate_success_score(self, metrics: List[Dict[str, Any]]) -> float:
+    def _calculate_success_score(self, aggregates: Dict[str, Any]) -> float:
         """Calculate success rate score (0-100)."""
-        if not metrics:
+        if not aggregates["count"]:
             return 0.0
         
-        successful_builds = sum(1 for m in metrics if m["success"])
-        success_rate = successful_builds / len(metrics)
-        
-        # Convert to 0-100 scale with slight penalty for any failures
-        if success_rate == 1.0:
-            return 100.0
-        elif success_rate >= 0.9:
-            return 85.0 + (success_rate - 0.9) * 150  # 85-100 range
-        elif success_rate >= 0.7:
-            return 60.0 + (success_rate - 0.7) * 125  # 60-85 range
-        else:
-            return success_rate * 85.0  # 0-60 range
+        return _SUCCESS_SCORES[aggregates["count"]][aggregates["n_success"]]
     
-    def _calculate_performance_score(self, metrics: List[Dict[str, Any]]) -> float:
+    def _calculate_performance_score(self, aggregates: Dict[str, Any]) -> float:
         """Calculate performance score based on duration trends."""
-        if not metrics:
+        if not aggregates["count"]:
             return 0.0
         
-        durations = [m["duration"] for m in metrics if m["duration"] > 0]
-        if len(durations) < 2:
+        n_positive = aggregates["n_positive_durations"]
+        if n_positive < 2:
             return 80.0  # Neutral score for insufficient data
         
-        # Calculate trend
-        recent_durations = durations[-5:] if len(durations) >= 5 else durations
-        older_durations = durations[:-5] if len(durations) >= 5 else []
-        
-        if older_durations:
-            recent_avg = statistics.mean(recent_durations)
-            older_avg = statistics.mean(older_durations)
+        # Calculate trend: last 5 positive durations against the older ones
+        if n_positive > 5:
+            recent_avg = aggregates["sum_positive_recent5"] / 5
+            older_avg = aggregates["sum_positive_older"] / (n_positive - 5)
             performance_ratio = older_avg / recent_avg if recent_avg > 0 else 1.0
             
             # Score based on performance trend
@@ -319,54 +769,38 @@ class HealthScoreTracker:
                 return 40.0
         
         # Check prediction accuracy if available
-        accurate_predictions = [m for m in metrics if m.get("prediction_accuracy", 0) > 0.8]
-        if len(accurate_predictions) >= 3:
-            avg_accuracy = statistics.mean([m["prediction_accuracy"] for m in accurate_predictions])
+        if aggregates["n_accurate"] >= 3:
+            avg_accuracy = aggregates["sum_accurate"] / aggregates["n_accurate"]
             return 70.0 + (avg_accuracy * 30)  # 70-100 based on accuracy
         
         return 75.0  # Default neutral performance score
     
-    def _calculate_warning_score(self, metrics: List[Dict[str, Any]]) -> float:
+    def _calculate_warning_score(self, aggregates: Dict[str, Any]) -> float:
         """Calculate warning score based on warning trends."""
-        if not metrics:
+        if not aggregates["count"]:
             return 100.0
         
-        warning_counts = [m.get("warning_count", 0) for m in metrics]
-        
-        if not any(warning_counts):
+        if not aggregates["any_warnings"]:
             return 100.0  # No warnings = perfect score
         
         # Calculate recent trend
-        recent_warnings = warning_counts[-5:] if len(warning_counts) >= 5 else warning_counts
-        avg_warnings = statistics.mean(recent_warnings)
-        
-        # Score based on average warning count
-        if avg_warnings == 0:
-            return 100.0
-        elif avg_warnings <= 2:
-            return 90.0
-        elif avg_warnings <= 5:
-            return 75.0
-        elif avg_warnings <= 10:
-            return 60.0
-        elif avg_warnings <= 20:
-            return 40.0
-        else:
-            return 20.0
+        # Band thresholds are whole numbers, so the rounded-up average selects the band
+        avg_warnings_ceil = -(-aggregates["sum_warnings_recent5"] // min(aggregates["count"], 5))
+        return _WARNING_SCORES[min(avg_warnings_ceil, len(_WARNING_SCORES) - 1)]
     
-    def _calculate_resource_score(self, metrics: List[Dict[str, Any]]) -> float:
+    def _calculate_resource_score(self, aggregates: Dict[str, Any]) -> float:
         """Calculate resource efficiency score."""
-        cpu_values = [m.get("cpu_usage") for m in metrics if m.get("cpu_usage") is not None]
-        memory_values = [m.get("memory_usage") for m in metrics if m.get("memory_usage") is not None]
+        n_cpu = aggregates["n_cpu"]
+        n_memory = aggregates["n_memory"]
         
-        if not cpu_values and not memory_values:
+        if not n_cpu and not n_memory:
             return 80.0  # Neutral score when no resource data
         
         score = 100.0
         
         # CPU efficiency scoring
-        if cpu_values:
-            avg_cpu = statistics.mean(cpu_values)
+        if n_cpu:
+            avg_cpu = aggregates["sum_cpu"] / n_cpu
             if avg_cpu > 95:  # Very high CPU usage
                 score -= 20
             elif avg_cpu > 85:  # High CPU usage
@@ -375,8 +809,8 @@ class HealthScoreTracker:
                 score -= 5
         
         # Memory efficiency scoring  
-        if memory_values:
-            avg_memory_gb = statistics.mean(memory_values) / 1024
+        if n_memory:
+            avg_memory_gb = aggregates["sum_memory"] / n_memory / 1024
             if avg_memory_gb > 8:  # Very high memory usage
                 score -= 20
             elif avg_memory_gb > 4:  # High memory usage
@@ -389,26 +823,15 @@ class HealthScoreTracker:
     def _calculate_prediction_accuracy(self, actual_duration: float, 
                                      predicted_duration: Optional[float]) -> float:
         """Calculate how accurate the duration prediction was."""
-        if predicted_duration is None or predicted_duration <= 0:
-            return 0.0
-        
-        if actual_duration <= 0:
+        if predicted_duration is None or predicted_duration <= 0 or actual_duration <= 0:
             return 0.0
         
-        # Calculate accuracy as 1 - (relative error)
-        relative_error = abs(actual_duration - predicted_duration) / predicted_duration
-        accuracy = max(0.0, 1.0 - relative_error)
-        
-        return accuracy
+        # Accuracy is 1 - (relative error), floored at 0
+        return max(0.0, 1.0 - math.fabs(actual_duration - predicted_duration) / predicted_duration)
     
     def _get_target_key(self, targets: List[str]) -> str:
         """Generate consistent target key for tracking."""
-        if not targets:
-            return "default_build"
-        
-        # Sort targets for consistency
-        sorted_targets = sorted(targets)
-        return "_".join(sorted_targets).replace("/", "_").replace("package_", "pkg_")
+        return _target_key(tuple(targets) if targets else ())
     
     def get_health_trend(self, targets: List[str]) -> Optional[str]:
         """Get health trend analysis for targets."""
@@ -421,32 +844,29 @@ class HealthScoreTracker:
         if len(history) < 3:
             return "insufficient_data"
         
-        # Analyze recent trend (last 5 scores)
-        recent_scores = [h["health_score"] for h in history[-5:]]
+        # Compare the older and newer halves of the history with Welch's t-test,
+        # which catches step changes and tolerates a single outlier score
+        scores = [h["health_score"] for h in history]
+        split = len(scores) // 2
+        older_mean, older_var = _mean_and_variance(scores[:split])
+        newer_mean, newer_var = _mean_and_variance(scores[split:])
         
-        if len(recent_scores) < 3:
+        difference = newer_mean - older_mean
+        if abs(difference) < TREND_MIN_DIFFERENCE:
+            # Scores are integers, so a 1-point move is noise however consistent it is
             return "stable"
         
-        # Calculate trend using linear regression slope
-        x_values = list(range(len(recent_scores)))
-        y_values = recent_scores
-        
-        n = len(recent_scores)
-        x_mean = statistics.mean(x_values)
-        y_mean = statistics.mean(y_values)
-        
-        numerator = sum((x - x_mean) * (y - y_mean) for x, y in zip(x_values, y_values))
-        denominator = sum((x - x_mean) ** 2 for x in x_values)
-        
-        if denominator == 0:
-            return "stable"
-        
-        slope = numerator / denominator
+        standard_error = math.sqrt(older_var / split + newer_var / (len(scores) - split))
+        if standard_error == 0:
+            # Constant halves that moved by at least the minimum difference
+            t_statistic = math.copysign(math.inf, difference)
+        else:
+            t_statistic = difference / standard_error
         
-        # Classify trend based on slope
-        if slope > 2.0:
+        # Classify trend based on the t-statistic
+        if t_statistic > TREND_T_THRESHOLD:
             return "improving"
-        elif slope < -2.0:
+        elif t_statistic < -TREND_T_THRESHOLD:
             return "declining" 
         else:
             return "stable"
@@ -458,43 +878,37 @@ class HealthScoreTracker:
         if target_key not in self.tracker_data["build_metrics"]:
             return {"error": "No health data available for these targets"}
         
-        metrics = self.tracker_data["build_metrics"][target_key]
-        health_score = self.calculate_health_score(targets)
+        buffer = self.tracker_data["build_metrics"][target_key]
+        # Reduce the metrics once and share the aggregates with the score calculation
+        aggregates = self._compute_aggregates(buffer)
+        health_score = self._score_target(target_key, aggregates)
         health_trend = self.get_health_trend(targets)
+        count = aggregates["count"]
         
         # Identify primary issues
         primary_issues = []
-        if len(metrics) >= 5:
-            recent_metrics = metrics[-5:]
-            
+        if count >= 5:
             # Check success rate
-            recent_failures = sum(1 for m in recent_metrics if not m["success"])
-            if recent_failures >= 2:
+            if aggregates["n_failures_recent5"] >= 2:
                 primary_issues.append("reliability_issues")
             
             # Check performance regression
-            if len(metrics) >= 10:
-                recent_durations = [m["duration"] for m in metrics[-5:]]
-                older_durations = [m["duration"] for m in metrics[-10:-5]]
-                if recent_durations and older_durations:
-                    recent_avg = statistics.mean(recent_durations)
-                    older_avg = statistics.mean(older_durations)
-                    if recent_avg > older_avg * 1.2:
-                        primary_issues.append("performance_regression")
+            if count >= 10:
+                if aggregates["sum_duration_recent5"] > aggregates["sum_duration_prev5"] * 1.2:
+                    primary_issues.append("performance_regression")
             
             # Check warning trends
-            recent_warnings = [m.get("warning_count", 0) for m in recent_metrics]
-            if statistics.mean(recent_warnings) > 5:
+            if aggregates["sum_warnings_recent5"] / 5 > 5:
                 primary_issues.append("warning_increase")
         
         return {
             "health_score": health_score,
             "health_trend": health_trend,
             "primary_issues": primary_issues,
-            "build_count": len(metrics),
-            "success_rate": sum(1 for m in metrics if m["success"]) / len(metrics) if metrics else 0,
-            "average_duration": statistics.mean([m["duration"] for m in metrics]) if metrics else 0,
-            "recent_warnings": statistics.mean([m.get("warning_count", 0) for m in metrics[-5:]]) if len(metrics) >= 5 else 0
+            "build_count": count,
+            "success_rate": aggregates["n_success"] / count if count else 0,
+            "average_duration": aggregates["sum_duration"] / count if count else 0,
+            "recent_warnings": aggregates["sum_warnings_recent5"] / 5 if count >= 5 else 0
         }
     
     def clear_health_data(self, targets: List[str] = None):
@@ -5,9 +5,14 @@ Ultra-compact CPU and memory usage monitoring during builds with minimal token o
 Provides background sampling with peak tracking and token-efficient JSON response format.
 """
 
+import functools
+import os
+import sys
 import time
 import threading
-from typing import Dict, Any, Optional
+from abc import ABC, abstractmethod
+from array import array
+from typing import Dict, Any, List, Optional, Tuple
 
 try:
     import psutil
@@ -15,118 +20,576 @@ try:
 except ImportError:
     HAS_PSUTIL = False
 
+# Without psutil, Linux can still be sampled by reading /proc directly
+CAN_SAMPLE = HAS_PSUTIL or sys.platform.startswith('linux')
+
+# Errors a sampling read may raise; a failed read skips that tick
+_SAMPLING_ERRORS = (OSError, ValueError, KeyError, IndexError) + ((psutil.Error,) if HAS_PSUTIL else ())
+
+# Number of recent samples kept for averaging
+SAMPLE_HISTORY = 100
+
+# Bytes to megabytes
+MB_SCALE = 1.0 / (1024 * 1024)
+
+# Stored samples are quantized: CPU in half-percent steps (0-200, one byte) and
+# memory in whole megabytes (four bytes)
+CPU_QUANTUM = 2
+MAX_CPU_QUANTIZED = 100 * CPU_QUANTUM
+MAX_MEMORY_QUANTIZED = 0xFFFFFFFF
+
+# Adaptive sampling: while the last FLAT_WINDOW samples vary by less than these
+# amounts, the interval doubles up to MAX_SAMPLE_INTERVAL; any change resets it
+FLAT_WINDOW = 5
+FLAT_CPU_STDDEV = 5.0
+FLAT_MEMORY_DELTA_MB = 50
+MAX_SAMPLE_INTERVAL = 30.0
+
+
+def _fmt_mem(memory_mb: int) -> str:
+    """Format whole megabytes compactly: "512m", "2g" or "1.5g" (GB truncated to tenths)."""
+    if memory_mb < 1024:
+        return f"{memory_mb}m"
+    gb, tenths = divmod(memory_mb * 10 // 1024, 10)
+    return f"{gb}.{tenths}g" if tenths else f"{gb}g"
+
+
+@functools.lru_cache(maxsize=1024)
+def _format_usage(cpu_percent: int, memory_mb: int, cpu_suffix: str) -> str:
+    """Format whole-number CPU % and memory MB as an ultra-compact "cpu/mem" string.
+    
+    Inputs are rounded to integers by the caller, so repeated readings that land
+    in the same bucket are served from the cache without re-formatting.
+    
+    Examples: "85%/1.5g", "75%/512m" (cpu_suffix="%"), "95/2g" (cpu_suffix="")
+    """
+    return f"{cpu_percent}{cpu_suffix}/{_fmt_mem(memory_mb)}"
+
+
+class _ProcSystemReader:
+    """System-wide CPU and memory usage read straight from /proc on Linux.
+    
+    Keeps /proc/stat and /proc/meminfo open and re-reads them with os.pread on
+    each tick, skipping psutil's per-call file opening, full-file parsing and
+    named-tuple construction.
+    """
+    
+    def __init__(self):
+        self._stat_fd = os.open('/proc/stat', os.O_RDONLY)
+        try:
+            self._meminfo_fd = os.open('/proc/meminfo', os.O_RDONLY)
+        except OSError:
+            os.close(self._stat_fd)
+            raise
+        # First read validates the formats
+        try:
+            self.read()
+        except (OSError, ValueError, KeyError, IndexError):
+            self.close()
+            raise
+    
+    @classmethod
+    def open(cls) -> Optional["_ProcSystemReader"]:
+        """Create a reader, or return None where /proc is unavailable or unreadable."""
+        if not sys.platform.startswith('linux'):
+            return None
+        try:
+            return cls()
+        except (OSError, ValueError, KeyError, IndexError):
+            return None
+    
+    def _cpu_times(self) -> Tuple[int, int]:
+        """Busy and total jiffies from the aggregate "cpu" line of /proc/stat."""
+        line = os.pread(self._stat_fd, 512, 0).split(b'\n', 1)[0]
+        # user nice system idle iowait irq softirq steal; guest time is already
+        # counted in user and nice, so the trailing guest fields are skipped
+        fields = [int(value) for value in line.split()[1:9]]
+        total = sum(fields)
+        return total - fields[3] - fields[4], total
+    
+    def read(self) -> Tuple[int, int, float]:
+        """Return (busy CPU jiffies, total CPU jiffies, used memory MB).
+        
+        CPU times are cumulative, so each monitor derives its CPU % from its own
+        previous reading. Used memory is MemTotal - MemAvailable, the memory not
+        reclaimable from page cache and buffers.
+        """
+        busy, total = self._cpu_times()
+        
+        # MemTotal and MemAvailable are within the first lines of /proc/meminfo
+        meminfo = {}
+        for line in os.pread(self._meminfo_fd, 512, 0).split(b'\n')[:3]:
+            key, _, value = line.partition(b':')
+            meminfo[key] = int(value.split()[0])
+        used_kb = meminfo[b'MemTotal'] - meminfo[b'MemAvailable']
+        return busy, total, used_kb / 1024.0  # Convert to MB
+    
+    def close(self):
+        """Close the /proc file descriptors."""
+        os.close(self._stat_fd)
+        os.close(self._meminfo_fd)
+
+
+class _ProcessTreeReader(ABC):
+    """CPU and memory usage of a build process together with all its descendants.
+    
+    make, cmake and ninja do little work themselves; the compilers and linkers
+    they spawn do. CPU is measured from the tree's cumulative CPU time: live
+    members' own time plus the time of children they have already reaped, so
+    compiler jobs that start and exit between two samples are still counted.
+    """
+    
+    def __init__(self):
+        self._last_cpu_time = None
+        self._last_wall_time = 0.0
+    
+    @abstractmethod
+    def _tree_usage(self) -> Tuple[float, int]:
+        """Return (cumulative CPU seconds, RSS bytes) summed over the process tree."""
+    
+    def read(self) -> Tuple[float, float]:
+        """Return (CPU % across all cores since the previous read, RSS MB)."""
+        cpu_time, rss_bytes = self._tree_usage()
+        wall_time = time.monotonic()
+        
+        if self._last_cpu_time is None:
+            cpu_percent = 0.0  # First read only sets the baseline
+        else:
+            elapsed = wall_time - self._last_wall_time
+            # A member leaving the tree unreaped can shrink the total; never report negative usage
+            cpu_delta = max(0.0, cpu_time - self._last_cpu_time)
+            cpu_percent = 100.0 * cpu_delta / elapsed if elapsed > 0 else 0.0
+        self._last_cpu_time, self._last_wall_time = cpu_time, wall_time
+        
+        return cpu_percent, rss_bytes * MB_SCALE  # Convert to MB
+    
+    def close(self):
+        """Release any resources held by the reader; the psutil reader holds none."""
+
+
+class _PsutilProcessReader(_ProcessTreeReader):
+    """Process tree CPU and memory usage through psutil."""
+    
+    def __init__(self, pid: int):
+        super().__init__()
+        self._process = psutil.Process(pid)
+    
+    def _tree_usage(self) -> Tuple[float, int]:
+        cpu_time = 0.0
+        rss_bytes = 0
+        for process in [self._process] + self._process.children(recursive=True):
+            try:
+                with process.oneshot():
+                    times = process.cpu_times()
+                    rss_bytes += process.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                if process is self._process:
+                    raise
+                continue  # Descendant exited or is off limits; its parent's totals cover it
+            cpu_time += times.user + times.system + times.children_user + times.children_system
+        return cpu_time, rss_bytes
+
+
+class _ProcProcessReader(_ProcessTreeReader):
+    """Process tree CPU and memory usage read from /proc on Linux without psutil.
+    
+    Keeps the build process's /proc/<pid>/stat and statm open and re-reads them
+    with os.pread; descendants are found through /proc/<pid>/task/<tid>/children.
+    """
+    
+    _CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+    
+    def __init__(self, pid: int):
+        super().__init__()
+        self._pid = pid
+        self._stat = open(f'/proc/{pid}/stat', 'rb', buffering=0)
+        try:
+            self._statm = open(f'/proc/{pid}/statm', 'rb', buffering=0)
+        except OSError:
+            self._stat.close()
+            raise
+    
+    @staticmethod
+    def _parse_usage(stat: bytes, statm: bytes) -> Tuple[int, int]:
+        """Return (utime + stime + cutime + cstime jiffies, resident pages)."""
+        # The command name may contain spaces, so fields are counted after its ')'
+        fields = stat[stat.rindex(b')') + 2:].split()
+        jiffies = int(fields[11]) + int(fields[12]) + int(fields[13]) + int(fields[14])
+        return jiffies, int(statm.split()[1])  # Second statm field is resident pages
+    
+    @staticmethod
+    def _children(pid: int) -> List[int]:
+        """Direct children of every thread of a process.
+        
+        Returns whatever could be read: nothing for a process that has exited,
+        and nothing at all on kernels built without CONFIG_PROC_CHILDREN, which
+        leaves the root's own usage (including its reaped children) as the sample.
+        """
+        children = []
+        try:
+            tids = os.listdir(f'/proc/{pid}/task')
+        except OSError:
+            return children
+        for tid in tids:
+            try:
+                with open(f'/proc/{pid}/task/{tid}/children', 'rb') as f:
+                    children.extend(int(child) for child in f.read().split())
+            except OSError:
+                continue  # Thread exited since listdir, or no children file
+        return children
+    
+    def _tree_usage(self) -> Tuple[float, int]:
+        jiffies, pages = self._parse_usage(os.pread(self._stat.fileno(), 1024, 0),
+                                           os.pread(self._statm.fileno(), 128, 0))
+        
+        pending = self._children(self._pid)
+        while pending:
+            pid = pending.pop()
+            try:
+                with open(f'/proc/{pid}/stat', 'rb') as f:
+                    stat = f.read()
+                with open(f'/proc/{pid}/statm', 'rb') as f:
+                    statm = f.read()
+                child_jiffies, child_pages = self._parse_usage(stat, statm)
+                pending.extend(self._children(pid))
+            except (OSError, ValueError, IndexError):
+                continue  # Descendant exited mid-read; its parent's totals cover it
+            jiffies += child_jiffies
+            pages += child_pages
+        
+        return jiffies / self._CLOCK_TICKS, pages * self._PAGE_SIZE
+    
+    def close(self):
+        """Close the /proc files; later reads fail instead of touching a reused descriptor."""
+        self._stat.close()
+        self._statm.close()
+
+
+def _open_process_reader(pid: int):
+    """Open a per-process reader, using psutil when it is installed."""
+    if HAS_PSUTIL:
+        return _PsutilProcessReader(pid)
+    return _ProcProcessReader(pid)
+
+
+class _SharedSampler:
+    """Single background thread that samples for every active ResourceMonitor.
+    
+    Concurrent builds share one thread instead of starting one each. A
+    monitor's first tick comes after its start delay and only primes the CPU
+    baseline; it then samples at its own interval. The thread sleeps until the
+    earliest monitor is due, and each deadline advances from the previous one
+    so the cadence does not drift with sampling time.
+    """
+    
+    def __init__(self):
+        self._monitors = set()
+        # Due monitors not yet ticked in the current batch, and the one being ticked
+        self._batch = set()
+        self._ticking = None
+        self._cond = threading.Condition()
+        self._thread = None
+    
+    def register(self, monitor: "ResourceMonitor", delay: float = 0.0):
+        """Start sampling for a monitor after `delay` seconds, starting the thread if needed.
+        
+        A pending start is cancelled by unregister(), like a running one.
+        """
+        with self._cond:
+            monitor._primed = False
+            monitor._next_due = time.monotonic() + delay
+            self._monitors.add(monitor)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True,
+                                                name="resource-sampler")
+                self._thread.start()
+            self._cond.notify()
+    
+    def unregister(self, monitor: "ResourceMonitor"):
+        """Stop sampling for a monitor; the thread exits once none are left.
+        
+        Waits for a tick already running for the monitor, so once this returns
+        the sampler no longer touches the monitor's samples or process reader.
+        """
+        with self._cond:
+            self._monitors.discard(monitor)
+            self._batch.discard(monitor)
+            while self._ticking is monitor:
+                self._cond.wait()
+            self._cond.notify_all()
+    
+    def _run(self):
+        """Sampling loop shared by all registered monitors."""
+        # Prefer reading /proc directly on Linux; psutil is the portable fallback.
+        # Either way the read returns cumulative CPU times, so each monitor
+        # measures usage over its own interval from its own baseline, without a
+        # blocking cpu_percent(interval=...) call holding up the thread
+        reader = _ProcSystemReader.open()
+        if reader is not None:
+            read_system = reader.read
+        elif HAS_PSUTIL:
+            # Bind hot-path callables once instead of resolving them every tick
+            cpu_times = psutil.cpu_times
+            virtual_memory = psutil.virtual_memory
+            
+            def read_system() -> Tuple[float, float, float]:
+                times = cpu_times()
+                # Guest time is already counted in user and nice
+                total = sum(times) - getattr(times, 'guest', 0) - getattr(times, 'guest_nice', 0)
+                idle = times.idle + getattr(times, 'iowait', 0)
+                return total - idle, total, virtual_memory().used * MB_SCALE
+        else:
+            read_system = None  # Only per-process monitors can be sampled
+        
+        try:
+            self._sample_until_idle(read_system)
+        finally:
+            if reader is not None:
+                reader.close()
+    
+    def wait_for_tick(self, monitor: "ResourceMonitor"):
+        """Block until no tick is running for a monitor."""
+        with self._cond:
+            while self._ticking is monitor:
+                self._cond.wait()
+    
+    def _sample_until_idle(self, read_system):
+        """Tick due monitors until none are registered."""
+        monotonic = time.monotonic
+        cond = self._cond
+        
+        while True:
+            with cond:
+                if not self._monitors:
+                    self._thread = None
+                    return
+                now = monotonic()
+                due = [m for m in self._monitors if m._next_due <= now]
+                if not due:
+                    cond.wait(min(m._next_due for m in self._monitors) - now)
+                    continue
+                self._batch.update(due)
+            
+            # System-wide counters are read once per tick and shared by every
+            # monitor that is not tracking a specific process
+            system_sample = None
+            try:
+                if read_system is not None and any(m._proc is None for m in due):
+                    system_sample = read_system()
+            except _SAMPLING_ERRORS:
+                pass  # Silently skip this tick - continue sampling
+            
+            for monitor in due:
+                with cond:
+                    if monitor not in self._batch:
+                        continue  # Unregistered since the batch was collected
+                    self._batch.discard(monitor)
+                    self._ticking = monitor
+                try:
+                    monitor._tick(system_sample)
+                except Exception:
+                    pass  # Silent failure - don't disrupt build monitoring
+                with cond:
+                    self._ticking = None
+                    interval = monitor._current_interval()
+                    monitor._next_due += interval
+                    if monitor._next_due < now:
+                        monitor._next_due = now + interval  # Fell behind; resync
+                    cond.notify_all()
+
+
+# Self-documentation metadata for AI assistants and help system
+_HELP_DATA = {
+    "name": "Resource Monitor",
+    "description": "Ultra-compact CPU and memory monitoring during builds with minimal token overhead",
+    "version": "1.0.0",
+    "features": [
+        "Background resource sampling every 2-5 seconds",
+        "Peak usage tracking with smart thresholds",
+        "Ultra-compact JSON format: 'res': '85%/1.5g'",
+        "Conditional inclusion based on meaningful usage",
+        "Optional build process tree CPU and memory (RSS) tracking by PID",
+        "One shared system-wide monitor for concurrent builds",
+        "Automatic thread management and cleanup"
+    ],
+    "configuration": {
+        "sample_interval": {
+            "type": "float",
+            "default": 2.5,
+            "range": [0.5, 10.0],
+            "description": "Sampling frequency in seconds"
+        },
+        "min_cpu_threshold": {
+            "type": "float", 
+            "default": 50.0,
+            "description": "Minimum CPU% to include in response"
+        },
+        "min_memory_threshold": {
+            "type": "int",
+            "default": 500,
+            "description": "Minimum memory MB to include in response"
+        }
+    },
+    "output_format": {
+        "res": "CPU%/Memory format (e.g., '85%/1.5g' or '75%/512m')",
+        "pk": "Peak values when significantly different (e.g., '95/2g')"
+    },
+    "token_cost": "4-8 tokens per build response (when included)",
+    "ai_metadata": {
+        "purpose": "Monitor resource usage during builds to identify bottlenecks",
+        "when_to_use": "Automatically enabled for builds longer than 30 seconds",
+        "interpretation": {
+            "high_cpu": ">80% indicates CPU-bound compilation",
+            "high_memory": ">1GB indicates memory-intensive build", 
+            "peaks": "Significant spikes suggest resource bottlenecks"
+        },
+        "recommendations": {
+            "high_resource_usage": "Consider reducing parallel jobs (-j flag)",
+            "memory_spikes": "Monitor for memory leaks or large object compilation",
+            "sustained_high_cpu": "Normal for intensive compilation"
+        }
+    },
+    "examples": [
+        {
+            "scenario": "Light compilation",
+            "output": {"res": "45%/512m"},
+            "interpretation": "Normal resource usage, no concerns"
+        },
+        {
+            "scenario": "Heavy parallel build",
+            "output": {"res": "85%/1.5g", "pk": "95/2g"},
+            "interpretation": "High resource usage with spikes, consider fewer parallel jobs"
+        },
+        {
+            "scenario": "Memory-intensive build",
+            "output": {"res": "60%/3g"},
+            "interpretation": "High memory usage, possible large object compilation"
+        }
+    ],
+    "troubleshooting": {
+        "psutil_not_available": "On Linux, sampling falls back to reading /proc; elsewhere install psutil",
+        "no_data_collected": "Build too short (<30s) or no meaningful resource usage",
+        "thread_errors": "Sampling thread failed - check system permissions"
+    }
+}
+
 
 class ResourceMonitor:
     """Lightweight resource usage monitoring during builds."""
     
+    # Seconds into a build before sampling begins; shorter builds never start sampling
+    LAZY_START_DELAY = 30.0
+    
+    # Peak usage a build must exceed for its resource metrics to be reported
+    MIN_CPU_THRESHOLD = 50.0
+    MIN_MEMORY_THRESHOLD_MB = 500.0
+    
     def __init__(self, sample_interval: float = 3.0):
         """Initialize with sampling interval in seconds."""
         self.sample_interval = sample_interval
         self.sampling_active = False
-        self.samples = []
+        # Recent samples as parallel ring buffers of quantized integers (CPU
+        # half-percents, memory MB, and the interval factor each sample covers)
+        # with exact integer running sums weighted by interval, so averages
+        # never rescan the history. Allocated once here and reused by every
+        # sampling session
+        self._ring_cpu = array('B', [0]) * SAMPLE_HISTORY
+        self._ring_mem = array('I', [0]) * SAMPLE_HISTORY
+        self._ring_weight = array('H', [0]) * SAMPLE_HISTORY
+        self._head = 0
+        self._count = 0
+        self._sum_cpu = 0
+        self._sum_mem = 0
+        self._sum_weight = 0
         self.peak_cpu = 0.0
         self.peak_memory_mb = 0.0
-        self.sampling_thread = None
+        # Newest (cpu, memory, peak cpu, peak memory), published by the sampler thread
+        # with a single reference store so readers need no lock
+        self._latest = None
+        # Reader for the build process whose RSS and CPU are sampled; None samples
+        # system-wide usage
+        self._proc = None
+        # Logical CPU count, looked up once to normalize per-process CPU to 0-100%
+        self._ncpu = (psutil.cpu_count(logical=True) if HAS_PSUTIL else os.cpu_count()) or 1
+        # Next sampling deadline on the shared sampler thread (time.monotonic)
+        self._next_due = 0.0
+        # Current interval as a multiple of sample_interval; grows while usage is flat
+        self._interval_factor = 1
+        self._max_interval_factor = max(1, int(MAX_SAMPLE_INTERVAL / sample_interval))
+        # Guards the start/stop lifecycle only; the sampler thread never takes it.
+        # Memory model: the sampler thread is the sole writer of samples, peaks and
+        # _latest, and sampling_active is a plain bool whose stores are atomic under
+        # the GIL, so readers need no lock
         self.lock = threading.Lock()
         self.start_time = None
-        
-        # Self-documentation metadata for AI assistants and help system
-        self.help_data = {
-            "name": "Resource Monitor",
-            "description": "Ultra-compact CPU and memory monitoring during builds with minimal token overhead",
-            "version": "1.0.0",
-            "features": [
-                "Background resource sampling every 2-5 seconds",
-                "Peak usage tracking with smart thresholds",
-                "Ultra-compact JSON format: 'res': '85%/1.5g'",
-                "Conditional inclusion based on meaningful usage",
-                "Automatic thread management and cleanup"
-            ],
-            "configuration": {
-                "sample_interval": {
-                    "type": "float",
-                    "default": 2.5,
-                    "range": [0.5, 10.0],
-                    "description": "Sampling frequency in seconds"
-                },
-                "min_cpu_threshold": {
-                    "type": "float", 
-                    "default": 50.0,
-                    "description": "Minimum CPU% to include in response"
-                },
-                "min_memory_threshold": {
-                    "type": "int",
-                    "default": 500,
-                    "description": "Minimum memory MB to include in response"
-                }
-            },
-            "output_format": {
-                "res": "CPU%/Memory format (e.g., '85%/1.5g' or '75%/512m')",
-                "pk": "Peak values when significantly different (e.g., '95/2g')"
-            },
-            "token_cost": "4-8 tokens per build response (when included)",
-            "ai_metadata": {
-                "purpose": "Monitor resource usage during builds to identify bottlenecks",
-                "when_to_use": "Automatically enabled for builds longer than 30 seconds",
-                "interpretation": {
-                    "high_cpu": ">80% indicates CPU-bound compilation",
-                    "high_memory": ">1GB indicates memory-intensive build", 
-                    "peaks": "Significant spikes suggest resource bottlenecks"
-                },
-                "recommendations": {
-                    "high_resource_usage": "Consider reducing parallel jobs (-j flag)",
-                    "memory_spikes": "Monitor for memory leaks or large object compilation",
-                    "sustained_high_cpu": "Normal for intensive compilation"
-                }
-            },
-            "examples": [
-                {
-                    "scenario": "Light compilation",
-                    "output": {"res": "45%/512m"},
-                    "interpretation": "Normal resource usage, no concerns"
-                },
-                {
-                    "scenario": "Heavy parallel build",
-                    "output": {"res": "85%/1.5g", "pk": "95/2g"},
-                    "interpretation": "High resource usage with spikes, consider fewer parallel jobs"
-                },
-                {
-                    "scenario": "Memory-intensive build",
-                    "output": {"res": "60%/3g"},
-                    "interpretation": "High memory usage, possible large object compilation"
-                }
-            ],
-            "troubleshooting": {
-                "psutil_not_available": "Resource monitoring disabled - install psutil",
-                "no_data_collected": "Build too short (<30s) or no meaningful resource usage",
-                "thread_errors": "Sampling thread failed - check system permissions"
-            }
-        }
+        # Whether the first tick has set the CPU baseline; samples start on the next one
+        self._primed = False
+        # (busy, total) system CPU times at this monitor's previous system-wide tick
+        self._last_system_cpu = None
+        # Per-owner windows that also receive every sample (see register());
+        # replaced wholesale so the sampler thread reads a consistent tuple
+        self._windows = ()
+    
+    @property
+    def help_data(self) -> Dict[str, Any]:
+        """Self-documentation metadata for AI assistants and help system."""
+        return _HELP_DATA
     
-    def start_sampling(self):
-        """Start background resource sampling."""
-        if not HAS_PSUTIL:
+    def start_sampling(self, pid: Optional[int] = None, delay: Optional[float] = None):
+        """Start background resource sampling.
+        
+        Sampling only begins once the build has run for `delay` seconds, so short
+        builds are never sampled. The wait is a deadline on the shared sampler
+        thread rather than a thread of its own.
+        
+        Args:
+            pid: Build process to sample CPU and memory (RSS) for, together
+                with the compilers and other descendants it spawns. If None,
+                system-wide CPU and used memory are sampled.
+            delay: Seconds to wait before sampling begins. Defaults to
+                LAZY_START_DELAY; 0 starts immediately.
+        """
+        if not CAN_SAMPLE:
             return False
             
         with self.lock:
             if self.sampling_active:
                 return True  # Already sampling
             
+            # Resolve the process once; the sampler reuses the reader every tick
+            try:
+                self._proc = _open_process_reader(pid) if pid is not None else None
+            except _SAMPLING_ERRORS:
+                return False
+            
             self.sampling_active = True
-            self.samples = []
+            # The rings are allocated once in __init__ and reused; resetting the
+            # indices and sums is enough to start a new session
+            self._head = 0
+            self._count = 0
+            self._sum_cpu = 0
+            self._sum_mem = 0
+            self._sum_weight = 0
+            self._interval_factor = 1
             self.peak_cpu = 0.0
             self.peak_memory_mb = 0.0
+            self._latest = None
             self.start_time = time.time()
             
-            # Start sampling thread
-            self.sampling_thread = threading.Thread(target=self._sampling_loop, daemon=True)
-            self.sampling_thread.start()
-            
+            if delay is None:
+                delay = self.LAZY_START_DELAY
+            _shared_sampler.register(self, max(0.0, delay))
+        
         return True
     
     def stop_sampling(self):
-        """Stop resource sampling and return final metrics."""
-        if not HAS_PSUTIL:
+        """Stop resource sampling and return final metrics.
+        
+        Returns None when nothing was sampled or usage never became meaningful,
+        so callers can include the result whenever it is not None.
+        """
+        if not CAN_SAMPLE:
             return None
             
         with self.lock:
@@ -134,167 +597,164 @@ class ResourceMonitor:
                 return None
                 
             self.sampling_active = False
-            
-            # Wait for sampling thread to finish
-            if self.sampling_thread and self.sampling_thread.is_alive():
-                self.sampling_thread.join(timeout=1.0)
+            # Also cancels a start that is still waiting out its delay. Returns only
+            # once no tick is running for this monitor, so the reader can be closed
+            # and the sums read without racing the sampler thread
+            _shared_sampler.unregister(self)
+            if self._proc is not None:
+                self._proc.close()
             
             return self._calculate_final_metrics()
     
-    def _sampling_loop(self):
-        """Background sampling loop."""
-        try:
-            while self.sampling_active:
-                try:
-                    # Get current resource usage
-                    cpu_percent = psutil.cpu_percent(interval=None)
-                    memory_info = psutil.virtual_memory()
-                    memory_mb = memory_info.used / (1024 * 1024)  # Convert to MB
-                    
-                    with self.lock:
-                        if self.sampling_active:  # Double-check while holding lock
-                            # Store sample
-                            self.samples.append({
-                                'timestamp': time.time(),
-                                'cpu_percent': cpu_percent,
-                                'memory_mb': memory_mb
-                            })
-                            
-                            # Update peaks
-                            self.peak_cpu = max(self.peak_cpu, cpu_percent)
-                            self.peak_memory_mb = max(self.peak_memory_mb, memory_mb)
-                            
-                            # Limit sample history to prevent memory growth (keep last 100 samples)
-                            if len(self.samples) > 100:
-                                self.samples = self.samples[-100:]
-                    
-                    # Sleep for sampling interval
-                    time.sleep(self.sample_interval)
-                    
-                except (psutil.Error, OSError) as e:
-                    # Silently handle psutil errors - continue sampling
-                    time.sleep(self.sample_interval)
-                    continue
-                    
-        except Exception:
-            # Silent failure - don't disrupt build monitoring
-            pass
-    
-    def _calculate_final_metrics(self) -> Dict[str, Any]:
-        """Calculate final resource usage metrics - ultra-compact format for <10 tokens."""
-        if not self.samples:
-            return None
-            
-        # Calculate average CPU usage (weighted by time)
-        total_cpu = 0.0
-        total_memory = 0.0
-        sample_count = len(self.samples)
+    def _tick(self, system_sample: Optional[tuple]):
+        """Take one sample; called by the shared sampler thread.
         
-        for sample in self.samples:
-            total_cpu += sample['cpu_percent']
-            total_memory += sample['memory_mb']
+        Args:
+            system_sample: (busy CPU time, total CPU time, used memory MB) read
+                system-wide for this tick, or None if it could not be read
+        """
+        proc = self._proc
+        if not self._primed:
+            # First tick after the start delay: set the CPU time baseline so the
+            # next sample covers one interval
+            if proc is not None:
+                proc.read()
+            elif system_sample is not None:
+                self._last_system_cpu = system_sample[:2]
+            else:
+                return  # Retry priming on the next tick
+            self._primed = True
+            return
         
-        avg_cpu = total_cpu / sample_count if sample_count > 0 else 0.0
-        avg_memory = total_memory / sample_count if sample_count > 0 else 0.0
+        if proc is not None:
+            process_cpu, memory_mb = proc.read()
+            # Process tree CPU spans all cores; scale to a 0-100% share of the
+            # machine, clamping the jitter of sampling a moving tree
+            cpu_percent = min(process_cpu / self._ncpu, 100.0)
+        elif system_sample is not None:
+            busy, total, memory_mb = system_sample
+            # CPU since this monitor's own previous tick, however often other
+            # monitors read the shared counters in between
+            last_busy, last_total = self._last_system_cpu
+            self._last_system_cpu = busy, total
+            delta_total = total - last_total
+            cpu_percent = 100.0 * (busy - last_busy) / delta_total if delta_total > 0 else 0.0
+        else:
+            return
         
-        # ULTRA-COMPACT FORMAT: Single string combining CPU and memory
-        # Format: "cpu%/memGB" or "cpu%/memMB" 
-        # Examples: "85%/1.5g" (7 chars), "75%/512m" (8 chars)
+        # Only the sampler thread writes samples and peaks (single producer). No
+        # sampling_active re-check: registration gates ticks, and unregister waits
+        # out a running one. The sample is weighted by the interval it covers
+        self._push_sample(cpu_percent, memory_mb, self._interval_factor)
+        for window in self._windows:
+            window.add(cpu_percent, memory_mb, self._interval_factor)
         
-        # Memory formatting - ultra-compact
-        if avg_memory >= 1024:
-            # Use 'g' for GB, strip trailing zeros
-            mem_val = avg_memory / 1024
-            if mem_val == int(mem_val):
-                mem_str = f"{int(mem_val)}g"
-            else:
-                mem_str = f"{mem_val:.1f}g".rstrip('0').rstrip('.')
+        # Back off while usage is flat; sample at the base rate again once it moves
+        if self._usage_is_flat():
+            self._interval_factor = min(self._interval_factor * 2, self._max_interval_factor)
         else:
-            mem_str = f"{int(avg_memory)}m"
+            self._interval_factor = 1
         
-        # CPU formatting - integer percentage for compactness
-        cpu_str = f"{int(round(avg_cpu))}%"
+        # Update peaks
+        self.peak_cpu = max(self.peak_cpu, cpu_percent)
+        self.peak_memory_mb = max(self.peak_memory_mb, memory_mb)
         
-        # Single field format: "cpu%/mem"
-        result = {"res": f"{cpu_str}/{mem_str}"}
+        # Publish a consistent snapshot for get_current_metrics
+        self._latest = (cpu_percent, memory_mb, self.peak_cpu, self.peak_memory_mb)
+    
+    def _current_interval(self) -> float:
+        """Seconds until the next sample, after any adaptive back-off."""
+        return self.sample_interval * self._interval_factor
+    
+    def _usage_is_flat(self) -> bool:
+        """Whether the last FLAT_WINDOW samples show steady CPU and memory usage."""
+        if self._count < FLAT_WINDOW:
+            return False
         
-        # Only include peaks if significantly different (>20% difference) and very high
-        peak_diff_cpu = (self.peak_cpu - avg_cpu) / avg_cpu if avg_cpu > 0 else 0
-        peak_diff_mem = (self.peak_memory_mb - avg_memory) / avg_memory if avg_memory > 0 else 0
+        slots = range(self._head - FLAT_WINDOW, self._head)
+        cpu = [self._ring_cpu[i] / CPU_QUANTUM for i in slots]
+        mem = [self._ring_mem[i] for i in slots]
         
-        # Only add peak info if both: significant difference AND high absolute values
-        if (peak_diff_cpu > 0.2 and self.peak_cpu > 80) or (peak_diff_mem > 0.2 and self.peak_memory_mb > 1024):
-            # Ultra-compact peak format: "p95/2g" (peak cpu 95%, peak mem 2GB)
-            peak_cpu_str = f"{int(round(self.peak_cpu))}"
-            if self.peak_memory_mb >= 1024:
-                peak_mem_val = self.peak_memory_mb / 1024
-                if peak_mem_val == int(peak_mem_val):
-                    peak_mem_str = f"{int(peak_mem_val)}g"
-                else:
-                    peak_mem_str = f"{peak_mem_val:.1f}g".rstrip('0').rstrip('.')
-            else:
-                peak_mem_str = f"{int(self.peak_memory_mb)}m"
+        mean_cpu = sum(cpu) / FLAT_WINDOW
+        cpu_variance = sum((c - mean_cpu) ** 2 for c in cpu) / FLAT_WINDOW
+        return (cpu_variance < FLAT_CPU_STDDEV ** 2 and
+                max(mem) - min(mem) < FLAT_MEMORY_DELTA_MB)
+    
+    def _push_sample(self, cpu_percent: float, memory_mb: float, weight: int = 1):
+        """Quantize a sample into the ring, replacing the oldest one's share of the running sums.
+        
+        Args:
+            cpu_percent: CPU usage percentage
+            memory_mb: Memory usage in MB
+            weight: Interval factor the sample covers, for time-weighted averages
+        """
+        cpu_q = min(int(cpu_percent * CPU_QUANTUM + 0.5), MAX_CPU_QUANTIZED)
+        mem_q = min(int(memory_mb), MAX_MEMORY_QUANTIZED)
+        
+        head = self._head
+        if self._count < SAMPLE_HISTORY:
+            # Slot still holds data from an earlier session, not part of the sums
+            self._count += 1
+        else:
+            old_weight = self._ring_weight[head]
+            self._sum_cpu -= self._ring_cpu[head] * old_weight
+            self._sum_mem -= self._ring_mem[head] * old_weight
+            self._sum_weight -= old_weight
+        self._sum_cpu += cpu_q * weight
+        self._sum_mem += mem_q * weight
+        self._sum_weight += weight
+        self._ring_cpu[head] = cpu_q
+        self._ring_mem[head] = mem_q
+        self._ring_weight[head] = weight
+        
+        self._head = (head + 1) % SAMPLE_HISTORY
+    
+    def _calculate_final_metrics(self) -> Optional[Dict[str, Any]]:
+        """Calculate final resource usage metrics - ultra-compact format for <10 tokens."""
+        if not self._count or not self._has_meaningful_usage():
+            return None  # Nothing worth reporting; skip the averaging and formatting
             
-            result["pk"] = f"{peak_cpu_str}/{peak_mem_str}"
+        # Calculate time-weighted average CPU and memory usage from the running sums
+        avg_cpu = self._sum_cpu / (self._sum_weight * CPU_QUANTUM)
+        avg_memory = self._sum_mem / self._sum_weight
         
-        return result
+        return self._format_result(avg_cpu, avg_memory, self.peak_cpu, self.peak_memory_mb)
     
     def get_current_metrics(self) -> Optional[Dict[str, Any]]:
         """Get current resource metrics without stopping sampling - ultra-compact format."""
-        if not HAS_PSUTIL or not self.sampling_active:
+        if not CAN_SAMPLE or not self.sampling_active:
             return None
-            
-        try:
-            with self.lock:
-                if not self.samples:
-                    return None
-                    
-                # Get most recent sample - ultra-compact format matching _calculate_final_metrics
-                latest = self.samples[-1]
-                current_cpu = latest['cpu_percent']
-                current_mem = latest['memory_mb']
-                
-                # Ultra-compact memory formatting
-                if current_mem >= 1024:
-                    mem_val = current_mem / 1024
-                    if mem_val == int(mem_val):
-                        mem_str = f"{int(mem_val)}g"
-                    else:
-                        mem_str = f"{mem_val:.1f}g".rstrip('0').rstrip('.')
-                else:
-                    mem_str = f"{int(current_mem)}m"
-                
-                # CPU formatting - integer percentage
-                cpu_str = f"{int(round(current_cpu))}%"
-                
-                # Single field format: "cpu%/mem"
-                result = {"res": f"{cpu_str}/{mem_str}"}
-                
-                # Only include peaks if significantly different from current AND very high
-                peak_diff_cpu = (self.peak_cpu - current_cpu) / current_cpu if current_cpu > 0 else 0
-                peak_diff_mem = (self.peak_memory_mb - current_mem) / current_mem if current_mem > 0 else 0
-                
-                if (peak_diff_cpu > 0.2 and self.peak_cpu > 80) or (peak_diff_mem > 0.2 and self.peak_memory_mb > 1024):
-                    # Ultra-compact peak format
-                    peak_cpu_str = f"{int(round(self.peak_cpu))}"
-                    if self.peak_memory_mb >= 1024:
-                        peak_mem_val = self.peak_memory_mb / 1024
-                        if peak_mem_val == int(peak_mem_val):
-                            peak_mem_str = f"{int(peak_mem_val)}g"
-                        else:
-                            peak_mem_str = f"{peak_mem_val:.1f}g".rstrip('0').rstrip('.')
-                    else:
-                        peak_mem_str = f"{int(self.peak_memory_mb)}m"
-                    
-                    result["pk"] = f"{peak_cpu_str}/{peak_mem_str}"
-                
-                return result
-        except Exception:
+        
+        latest = self._latest
+        if latest is None:
             return None
+        
+        # Most recent sample with the peaks published alongside it
+        return self._format_result(*latest)
+    
+    @staticmethod
+    def _format_result(cpu: float, mem_mb: float,
+                       peak_cpu: float, peak_mem_mb: float) -> Dict[str, str]:
+        """Build the ultra-compact response for a CPU/memory reading and the peaks so far."""
+        # ULTRA-COMPACT FORMAT: Single string combining CPU and memory
+        # Format: "cpu%/memGB" or "cpu%/memMB" 
+        # Examples: "85%/1.5g" (7 chars), "75%/512m" (8 chars)
+        result = {"res": _format_usage(int(round(cpu)), int(mem_mb), "%")}
+        
+        # Only include peaks if significantly different (>20% difference) and very high
+        peak_diff_cpu = (peak_cpu - cpu) / cpu if cpu > 0 else 0
+        peak_diff_mem = (peak_mem_mb - mem_mb) / mem_mb if mem_mb > 0 else 0
+        
+        # Only add peak info if both: significant difference AND high absolute values
+        if (peak_diff_cpu > 0.2 and peak_cpu > 80) or (peak_diff_mem > 0.2 and peak_mem_mb > 1024):
+            # Ultra-compact peak format: "95/2g" (peak cpu 95%, peak mem 2GB)
+            result["pk"] = _format_usage(int(round(peak_cpu)), int(peak_mem_mb), "")
+        
+        return result
     
     def should_include_in_response(self, build_duration: float = None) -> bool:
         """Determine if resource usage should be included in response."""
-        if not HAS_PSUTIL or not self.samples:
+        if not CAN_SAMPLE or not self._count:
             return False
             
         # Exclude for very short builds (< 30 seconds)
@@ -302,5 +762,97 @@ class ResourceMonitor:
             return False
             
         # Include if meaningful resource usage detected
-        with self.lock:
-            return (self.peak_cpu > 50.0 or self.peak_memory_mb > 500.0)
\ No newline at end of file
+        return self._has_meaningful_usage()
+    
+    def _has_meaningful_usage(self) -> bool:
+        """Whether peak usage crossed the CPU or memory reporting threshold."""
+        return self._peaks_are_meaningful(self.peak_cpu, self.peak_memory_mb)
+    
+    @classmethod
+    def _peaks_are_meaningful(cls, peak_cpu: float, peak_memory_mb: float) -> bool:
+        """Whether the given peaks cross the CPU or memory reporting threshold."""
+        return (peak_cpu > cls.MIN_CPU_THRESHOLD or
+                peak_memory_mb > cls.MIN_MEMORY_THRESHOLD_MB)
+
+
+# Sampling thread shared by all ResourceMonitor instances
+_shared_sampler = _SharedSampler()
+
+
+class _OwnerWindow:
+    """Time-weighted sums and peaks of the shared monitor's samples while one owner holds it."""
+    
+    __slots__ = ('sum_cpu', 'sum_memory', 'sum_weight', 'peak_cpu', 'peak_memory_mb')
+    
+    def __init__(self):
+        self.sum_cpu = 0.0
+        self.sum_memory = 0.0
+        self.sum_weight = 0
+        self.peak_cpu = 0.0
+        self.peak_memory_mb = 0.0
+    
+    def add(self, cpu_percent: float, memory_mb: float, weight: int):
+        """Fold one sample into the window; called by the shared sampler thread."""
+        self.sum_cpu += cpu_percent * weight
+        self.sum_memory += memory_mb * weight
+        self.sum_weight += weight
+        self.peak_cpu = max(self.peak_cpu, cpu_percent)
+        self.peak_memory_mb = max(self.peak_memory_mb, memory_mb)
+    
+    def final_metrics(self) -> Optional[Dict[str, str]]:
+        """Average usage over the window, or None if nothing meaningful was sampled."""
+        if (not self.sum_weight or
+                not ResourceMonitor._peaks_are_meaningful(self.peak_cpu, self.peak_memory_mb)):
+            return None
+        return ResourceMonitor._format_result(self.sum_cpu / self.sum_weight,
+                                              self.sum_memory / self.sum_weight,
+                                              self.peak_cpu, self.peak_memory_mb)
+
+
+# System-wide monitor shared by concurrent builds, kept alive while any owner holds it
+_global = ResourceMonitor()
+_owners: Dict[Any, _OwnerWindow] = {}
+_owners_lock = threading.Lock()
+
+
+def register(owner: Any) -> ResourceMonitor:
+    """Add a build as an owner of the shared system-wide monitor.
+    
+    The first owner lazily starts sampling; later owners share the same samples.
+    Each owner gets the usage sampled while it held the monitor back from
+    unregister(). Per-build RSS still needs a ResourceMonitor started with that
+    build's pid.
+    
+    Args:
+        owner: Hashable token identifying the build, passed back to unregister().
+    
+    Returns:
+        The shared monitor, for get_current_metrics() calls.
+    """
+    with _owners_lock:
+        if owner not in _owners:
+            window = _owners[owner] = _OwnerWindow()
+            _global._windows = _global._windows + (window,)
+        if len(_owners) == 1:
+            _global.start_sampling()
+    return _global
+
+
+def unregister(owner: Any) -> Optional[Dict[str, str]]:
+    """Remove a build's ownership; sampling stops when the last owner leaves.
+    
+    Returns:
+        Final metrics for the samples taken while this owner held the monitor,
+        or None if there were none worth reporting.
+    """
+    with _owners_lock:
+        window = _owners.pop(owner, None)
+        if window is None:
+            return None
+        _global._windows = tuple(w for w in _global._windows if w is not window)
+        if _owners:
+            # A running tick may still be adding to the window
+            _shared_sampler.wait_for_tick(_global)
+        else:
+            _global.stop_sampling()
+    return window.final_metrics()
@@ -0,0 +1,59 @@
+"""Tests for the fix suggestions prefilter and per-pattern matching."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from modules.fix_suggestions import FixSuggestionsDatabase
+
+
+def _pattern(*regex_patterns):
+    return {
+        "regex_patterns": list(regex_patterns),
+        "suggested_fix": "Custom fix",
+        "fix_commands": ["make clean"],
+        "fix_type": "quick",
+        "confidence": 90,
+    }
+
+
+class PrefilterTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db = FixSuggestionsDatabase(Path(self._tmp.name) / "fix_suggestions.json")
+    
+    def tearDown(self):
+        self._tmp.cleanup()
+    
+    def assertSuggestionsAgree(self, pattern_id, error):
+        """get_fix_suggestions must suggest a pattern whenever test_pattern_match would."""
+        would_suggest = self.db.test_pattern_match(pattern_id, error)["would_suggest"]
+        suggested = [s["pattern"] for s in self.db.get_fix_suggestions(error)]
+        self.assertTrue(would_suggest)
+        self.assertIn(pattern_id, suggested)
+    
+    def test_backreference_pattern_is_suggested(self):
+        self.assertTrue(self.db.add_custom_pattern("backref", _pattern(r"(a)\1")))
+        self.assertSuggestionsAgree("backref", "aa")
+    
+    def test_duplicate_named_groups_keep_prefilter_for_other_patterns(self):
+        self.assertTrue(self.db.add_custom_pattern("named_a", _pattern(r"(?P<lib>foo)x")))
+        self.assertTrue(self.db.add_custom_pattern("named_b", _pattern(r"(?P<lib>bar)y")))
+        self.assertIsNotNone(self.db._prefilter_re)
+        self.assertSuggestionsAgree("named_b", "bary")
+        self.assertSuggestionsAgree("missing_zlib_headers",
+                                    "fatal error: zlib.h: No such file or directory")
+    
+    def test_leading_inline_flags_load_and_match(self):
+        self.assertTrue(self.db.add_custom_pattern("flags", _pattern(r"(?i)linker oops", "other")))
+        self.db = FixSuggestionsDatabase(self.db.suggestions_file)
+        self.assertSuggestionsAgree("flags", "LINKER OOPS")
+        self.assertSuggestionsAgree("flags", "other")
+    
+    def test_unmatched_error_has_no_suggestions(self):
+        self.db.add_custom_pattern("backref", _pattern(r"(a)\1"))
+        self.assertEqual(self.db.get_fix_suggestions("nothing relevant here"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
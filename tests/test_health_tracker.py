@@ -0,0 +1,83 @@
+"""Tests for the health tracker snapshot and event log persistence."""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from modules.health_tracker import HealthScoreTracker
+
+
+class EventLogTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tracker_file = Path(self._tmp.name) / "health_tracker.json"
+    
+    def tearDown(self):
+        self._tmp.cleanup()
+    
+    def _tracker(self):
+        return HealthScoreTracker(self.tracker_file)
+    
+    def _builds(self, tracker, target="app"):
+        buffer = tracker.tracker_data["build_metrics"].get(tracker._get_target_key([target]))
+        return buffer.count if buffer is not None else 0
+    
+    def test_events_replay_without_snapshot(self):
+        tracker = self._tracker()
+        for _ in range(3):
+            tracker.record_build_completion(["app"], True, 10.0)
+        self.assertFalse(self.tracker_file.exists())
+        
+        reloaded = self._tracker()
+        self.assertEqual(self._builds(reloaded), 3)
+        self.assertEqual(reloaded.tracker_data["metadata"]["last_event_seq"], 3)
+    
+    def test_snapshot_then_replay_skips_folded_events(self):
+        tracker = self._tracker()
+        for _ in range(2):
+            tracker.record_build_completion(["app"], True, 10.0)
+        tracker._save_tracker_data()
+        self.assertFalse(tracker.events_file.exists())
+        tracker.record_build_completion(["app"], False, 12.0)
+        
+        # An event already folded into the snapshot must not be applied twice
+        snapshot_seq = json.loads(self.tracker_file.read_text())["metadata"]["last_event_seq"]
+        stale = {"seq": snapshot_seq, "target_key": tracker._get_target_key(["app"]),
+                 "record": {"success": True, "duration": 99.0}}
+        with open(tracker.events_file, "a") as f:
+            f.write(json.dumps(stale) + "\n")
+        
+        reloaded = self._tracker()
+        self.assertEqual(self._builds(reloaded), 3)
+        self.assertEqual(reloaded.tracker_data["metadata"]["last_event_seq"], 3)
+    
+    def test_append_after_torn_line_is_kept(self):
+        tracker = self._tracker()
+        tracker.record_build_completion(["app"], True, 10.0)
+        with open(tracker.events_file, "a") as f:
+            f.write('{"seq": 2, "target_key": "app", "rec')  # Interrupted write
+        
+        second = self._tracker()
+        self.assertEqual(self._builds(second), 1)
+        second.record_build_completion(["app"], True, 11.0)
+        
+        self.assertEqual(self._builds(self._tracker()), 2)
+    
+    def test_malformed_event_does_not_stop_replay(self):
+        tracker = self._tracker()
+        tracker.record_build_completion(["app"], True, 10.0)
+        with open(tracker.events_file, "a") as f:
+            f.write(json.dumps({"seq": 2, "record": {}}) + "\n")
+        tracker._apply_build_record(tracker._get_target_key(["app"]),
+                                    {"success": True, "duration": 11.0, "timestamp": 0.0}, 3)
+        tracker._append_event(tracker._get_target_key(["app"]),
+                              {"success": True, "duration": 11.0, "timestamp": 0.0}, 3)
+        
+        reloaded = self._tracker()
+        self.assertEqual(self._builds(reloaded), 2)
+        self.assertEqual(reloaded.tracker_data["metadata"]["last_event_seq"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()